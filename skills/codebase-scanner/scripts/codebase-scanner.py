@@ -5,17 +5,29 @@ for use by the Project Documenter agent.
 
 Usage:
     python3 codebase-scanner.py /path/to/project [--output project_map.json]
+    python3 codebase-scanner.py /path/to/project --resume
+    python3 codebase-scanner.py /path/to/project --clones [--clone-threshold 0.8]
+
+Progress is checkpointed to <output>.checkpoint while scanning; --resume
+continues from it after a kill or timeout.
+
+Parses .py files and the code cells of .ipynb notebooks.
 
 Extracts: structure, modules (classes, functions, decorators), imports,
-routes, models, dependencies, configs, infrastructure.
+routes, models, dependencies, configs, infrastructure, blocking calls in
+async code, and optionally clone groups (duplicated functions/classes).
 """
 
 import ast
+import hashlib
 import json
 import os
 import re
+import signal
 import sys
 import argparse
+import struct
+import tempfile
 from pathlib import Path
 from collections import defaultdict
 
@@ -28,6 +40,30 @@ IGNORE_DIRS = {
 
 IGNORE_FILES = {'.DS_Store', 'Thumbs.db'}
 
+CHECKPOINT_VERSION = 3
+CHECKPOINT_EVERY = 500
+
+BLOCKING_CALLS = {
+    'open', 'input',
+    'time.sleep',
+    'requests.get', 'requests.post', 'requests.put', 'requests.patch',
+    'requests.delete', 'requests.head', 'requests.options', 'requests.request',
+    'urllib.request.urlopen',
+    'subprocess.run', 'subprocess.call', 'subprocess.check_call',
+    'subprocess.check_output', 'os.system',
+    'socket.create_connection',
+    'sqlite3.connect', 'psycopg2.connect', 'pymysql.connect', 'MySQLdb.connect',
+    'pymongo.MongoClient', 'redis.Redis', 'redis.StrictRedis', 'redis.from_url',
+    'boto3.client', 'boto3.resource',
+}
+
+CLONE_MIN_NODES = 40
+CLONE_SHINGLE_SIZE = 5
+CLONE_THRESHOLD = 0.8
+CLONE_BANDS = 8
+CLONE_ROWS = 4
+CLONE_MAX_BUCKET = 1000
+
 ROUTE_DECORATORS = {
     'route', 'get', 'post', 'put', 'delete', 'patch', 'head', 'options',
     'api_view', 'action',
@@ -82,7 +118,7 @@ def scan_structure(root_path):
             filepath = os.path.join(dirpath, f)
             try:
                 with open(filepath, 'r', encoding='utf-8', errors='ignore') as fh:
-                    line_count = sum(1 for _ in fh)
+                    line_count = _count_lines(fh)
                 total_lines[ext] += line_count
                 files_info.append({'name': f, 'lines': line_count})
             except (OSError, PermissionError):
@@ -97,7 +133,19 @@ def scan_structure(root_path):
     return structure, dict(total_files), dict(total_lines)
 
 
-def parse_python_file(filepath, root_path):
+def _count_lines(fh, chunk_size=1 << 16):
+    """Count lines in fixed-size chunks so huge single-line files stay cheap."""
+    count = 0
+    last = ''
+    for chunk in iter(lambda: fh.read(chunk_size), ''):
+        count += chunk.count('\n')
+        last = chunk[-1]
+    if last and last != '\n':
+        count += 1
+    return count
+
+
+def parse_python_file(filepath, root_path, fingerprints=None):
     try:
         with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
             source = f.read()
@@ -110,6 +158,10 @@ def parse_python_file(filepath, root_path):
         return None
 
     rel_path = os.path.relpath(filepath, root_path)
+    return _analyze_tree(tree, rel_path, root_path, fingerprints)
+
+
+def _analyze_tree(tree, rel_path, root_path, fingerprints=None):
     module_info = {
         'file': rel_path,
         'docstring': ast.get_docstring(tree) or '',
@@ -120,6 +172,8 @@ def parse_python_file(filepath, root_path):
     }
 
     project_name = os.path.basename(root_path)
+    aliases = {}
+    has_async = False
 
     for node in ast.walk(tree):
         if isinstance(node, ast.ClassDef):
@@ -145,12 +199,15 @@ def parse_python_file(filepath, root_path):
                         'name': item.name,
                         'decorators': [_get_decorator_name(d) for d in item.decorator_list],
                         'args': [a.arg for a in item.args.args if a.arg != 'self'],
+                        'is_async': isinstance(item, ast.AsyncFunctionDef),
+                        'line': item.lineno,
                     }
                     class_info['methods'].append(method_info)
 
             module_info['classes'].append(class_info)
 
         elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            has_async = has_async or isinstance(node, ast.AsyncFunctionDef)
             if _is_top_level(node, tree):
                 func_info = {
                     'name': node.name,
@@ -166,8 +223,13 @@ def parse_python_file(filepath, root_path):
         elif isinstance(node, ast.Import):
             for alias in node.names:
                 module_info['imports_external'].append(alias.name.split('.')[0])
+                if alias.asname:
+                    aliases[alias.asname] = alias.name
 
         elif isinstance(node, ast.ImportFrom):
+            if node.module and not node.level:
+                for alias in node.names:
+                    aliases[alias.asname or alias.name] = f"{node.module}.{alias.name}"
             if node.module:
                 root_module = node.module.split('.')[0]
                 src_parts = _get_project_packages(root_path)
@@ -178,7 +240,486 @@ def parse_python_file(filepath, root_path):
 
     module_info['imports_external'] = sorted(set(module_info['imports_external']))
     module_info['imports_internal'] = sorted(set(module_info['imports_internal']))
+    module_info['async_blocking'] = find_async_blocking(tree, aliases) if has_async else []
+
+    if fingerprints is not None:
+        fingerprint_definitions(tree, rel_path, fingerprints)
+
+    return module_info
+
+
+def _normalized_tokens(node):
+    """Flatten an AST into node-type tokens with identifiers and literal values dropped."""
+    tokens = []
+
+    def visit(n):
+        if isinstance(n, ast.Constant):
+            tokens.append(f"Constant:{type(n.value).__name__}")
+        else:
+            tokens.append(type(n).__name__)
+        for child in ast.iter_child_nodes(n):
+            visit(child)
+        tokens.append('/')
+
+    visit(node)
+    return tokens
+
+
+def _minhash_signature(shingles):
+    columns = []
+    for shingle in shingles:
+        data = shingle.encode('utf-8')
+        digest = (hashlib.blake2b(data, digest_size=64).digest()
+                  + hashlib.blake2b(data, digest_size=64, salt=b'clones').digest())
+        columns.append(struct.unpack('<32I', digest))
+    return [min(values) for values in zip(*columns)]
+
+
+def _fingerprint(node):
+    try:
+        tokens = _normalized_tokens(node)
+    except RecursionError:
+        return None
+    types = [t for t in tokens if t != '/']
+    if len(types) < CLONE_MIN_NODES:
+        return None
+    shingles = {' '.join(types[i:i + CLONE_SHINGLE_SIZE])
+                for i in range(len(types) - CLONE_SHINGLE_SIZE + 1)}
+    return {
+        'hash': hashlib.blake2b(' '.join(tokens).encode('utf-8'), digest_size=16).hexdigest(),
+        'signature': _minhash_signature(shingles),
+    }
+
+
+# match_case only exists on Python 3.10+.
+_STATEMENT_NODES = tuple(getattr(ast, name) for name in ('stmt', 'excepthandler', 'match_case')
+                         if hasattr(ast, name))
+
+
+def _iter_definitions(node, prefix='', in_class=False):
+    """Yield (qualname, node, kind) for every function, method and class.
+
+    Only statement nodes are descended into; definitions cannot appear
+    inside expressions.
+    """
+    for child in ast.iter_child_nodes(node):
+        if not isinstance(child, _STATEMENT_NODES):
+            continue
+        if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            qualname = f"{prefix}{child.name}"
+            if isinstance(child, ast.ClassDef):
+                kind = 'class'
+            else:
+                kind = 'method' if in_class else 'function'
+            yield qualname, child, kind
+            yield from _iter_definitions(child, f"{qualname}.", isinstance(child, ast.ClassDef))
+        else:
+            yield from _iter_definitions(child, prefix, in_class)
+
+
+def fingerprint_definitions(tree, rel_path, fingerprints):
+    """Append normalized AST fingerprints of every function, method and class."""
+    for qualname, node, kind in _iter_definitions(tree):
+        fp = _fingerprint(node)
+        if fp:
+            fingerprints.append({
+                'name': qualname,
+                'kind': kind,
+                'file': rel_path,
+                'line': node.lineno,
+                'end_line': getattr(node, 'end_lineno', node.lineno),
+                **fp,
+            })
+
+
+def _call_name(func, aliases):
+    if isinstance(func, ast.Name):
+        name = func.id
+    elif isinstance(func, ast.Attribute):
+        base = func
+        while isinstance(base, ast.Attribute):
+            base = base.value
+        if not isinstance(base, ast.Name):
+            return None
+        name = _get_attr_name(func)
+    else:
+        return None
+    head, sep, rest = name.partition('.')
+    if head in aliases:
+        name = aliases[head] + sep + rest
+    return name
+
+
+def _scan_calls(func_node, aliases):
+    """Return (blocking, other) calls made directly in a function body.
+
+    Nested functions, classes and lambdas are skipped: their bodies do not run
+    when the enclosing function runs.
+    """
+    blocking, other = [], []
+    stack = list(func_node.body)
+    while stack:
+        node = stack.pop()
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.Lambda)):
+            continue
+        if isinstance(node, ast.Call):
+            name = _call_name(node.func, aliases)
+            if name in BLOCKING_CALLS:
+                blocking.append({'call': name, 'line': node.lineno})
+            elif name:
+                other.append(name)
+        stack.extend(ast.iter_child_nodes(node))
+    blocking.sort(key=lambda c: c['line'])
+    return blocking, other
+
+
+def find_async_blocking(tree, aliases):
+    """Find blocking calls reachable from each async function or method.
+
+    Calls to sync functions and ``self``/``cls`` methods of the same module are
+    followed transitively; such findings carry the helper chain in ``via``.
+    ``aliases`` maps imported names to their dotted targets. Function bodies
+    are scanned on demand, so only async functions and the helpers they reach
+    are visited.
+    """
+    defs = {qualname: (node, kind) for qualname, node, kind in _iter_definitions(tree)
+            if kind != 'class'}
+    scanned = {}
+
+    def scan(qualname):
+        if qualname not in scanned:
+            scanned[qualname] = _scan_calls(defs[qualname][0], aliases)
+        return scanned[qualname]
+
+    def resolve(caller, name):
+        head, _, attr = name.partition('.')
+        if head in ('self', 'cls') and attr and '.' not in attr and '.' in caller:
+            return f"{caller.rsplit('.', 1)[0]}.{attr}"
+        if name in defs and defs[name][1] == 'function':
+            return name
+        return None
+
+    memo = {}
+
+    def reachable(qualname, visiting):
+        if qualname in memo:
+            return memo[qualname]
+        node = defs[qualname][0]
+        blocking, other = scan(qualname)
+        found = [dict(call) for call in blocking]
+        visiting = visiting | {qualname}
+        for name in other:
+            callee = resolve(qualname, name)
+            if not callee or callee not in defs or callee in visiting:
+                continue
+            if isinstance(defs[callee][0], ast.AsyncFunctionDef):
+                continue
+            for call in reachable(callee, visiting):
+                found.append({**call, 'via': [callee] + call.get('via', [])})
+        if not isinstance(node, ast.AsyncFunctionDef):
+            memo[qualname] = found
+        return found
+
+    results = []
+    for qualname, (node, _) in defs.items():
+        if isinstance(node, ast.AsyncFunctionDef):
+            calls = reachable(qualname, frozenset())
+            if calls:
+                results.append({'function': qualname, 'line': node.lineno, 'calls': calls})
+    return results
+
+
+def _estimated_similarity(sig_a, sig_b):
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / len(sig_a)
+
+
+def detect_clones(fingerprints, threshold=CLONE_THRESHOLD):
+    """Group fingerprints into exact clones (same normalized hash) and near
+    clones (MinHash LSH buckets verified against threshold)."""
+    by_hash = defaultdict(list)
+    for fp in fingerprints:
+        by_hash[fp['hash']].append(fp)
+    groups = list(by_hash.values())
+
+    parent = list(range(len(groups)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    buckets = defaultdict(list)
+    for idx, members in enumerate(groups):
+        sig = members[0]['signature']
+        for band in range(CLONE_BANDS):
+            rows = tuple(sig[band * CLONE_ROWS:(band + 1) * CLONE_ROWS])
+            buckets[(band, rows)].append(idx)
+
+    seen = set()
+    for ids in buckets.values():
+        if len(ids) < 2 or len(ids) > CLONE_MAX_BUCKET:
+            continue
+        for pos, a in enumerate(ids):
+            sig_a = groups[a][0]['signature']
+            for b in ids[pos + 1:]:
+                if (a, b) in seen:
+                    continue
+                seen.add((a, b))
+                if find(a) == find(b):
+                    continue  # already linked through other pairs
+                if _estimated_similarity(sig_a, groups[b][0]['signature']) >= threshold:
+                    parent[find(b)] = find(a)
+
+    def member(fp):
+        return {k: fp[k] for k in ('name', 'kind', 'file', 'cell', 'line', 'end_line') if k in fp}
+
+    def weight(group):
+        return len(group['members']) * max(m['end_line'] - m['line'] + 1 for m in group['members'])
+
+    exact = [
+        {'hash': members[0]['hash'], 'members': [member(fp) for fp in members]}
+        for members in groups if len(members) > 1
+    ]
+
+    clusters = defaultdict(list)
+    for idx in range(len(groups)):
+        clusters[find(idx)].append(idx)
+    near = []
+    for ids in clusters.values():
+        if len(ids) < 2:
+            continue
+        sigs = [groups[i][0]['signature'] for i in ids]
+        near.append({
+            'similarity': round(min(_estimated_similarity(sigs[0], sig) for sig in sigs[1:]), 2),
+            'members': [member(fp) for i in ids for fp in groups[i]],
+        })
+
+    exact.sort(key=weight, reverse=True)
+    near.sort(key=weight, reverse=True)
+    return {'threshold': threshold, 'exact': exact, 'near': near}
+
+
+class _JsonStream:
+    """Minimal pull parser over a JSON text file.
+
+    Values can be skipped without being materialized, so multi-megabyte
+    strings (e.g. base64 images in notebook outputs) never sit in memory whole.
+    """
+
+    CHUNK_SIZE = 1 << 16
+    _WHITESPACE = re.compile(r'[ \t\r\n]*')
+    _STRING_STOP = re.compile(r'["\\]')
+    _CONTAINER_STOP = re.compile(r'["{}\[\]]')
+    _SCALAR_END = re.compile(r'[,}\]\s]')
+
+    def __init__(self, fh):
+        self.fh = fh
+        self.buf = ''
+        self.pos = 0
+
+    def _fill(self):
+        data = self.fh.read(self.CHUNK_SIZE)
+        if not data:
+            return False
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def peek(self):
+        while True:
+            self.pos = self._WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                raise ValueError('unexpected end of JSON')
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"expected {char!r} at offset {self.pos}")
+        self.pos += 1
+
+    def string(self, keep=True):
+        self.expect('"')
+        parts = []
+        while True:
+            m = self._STRING_STOP.search(self.buf, self.pos)
+            if not m:
+                if keep:
+                    parts.append(self.buf[self.pos:])
+                self.pos = len(self.buf)
+                if not self._fill():
+                    raise ValueError('unterminated string')
+                continue
+            if keep:
+                parts.append(self.buf[self.pos:m.start()])
+            if m.group() == '"':
+                self.pos = m.end()
+                return json.loads(f'"{"".join(parts)}"') if keep else None
+            while m.start() + 2 > len(self.buf):
+                self.pos = m.start()
+                if not self._fill():
+                    raise ValueError('unterminated string')
+                m = self._STRING_STOP.match(self.buf, self.pos)
+            if keep:
+                parts.append(self.buf[m.start():m.start() + 2])
+            self.pos = m.start() + 2
+
+    def _scalar(self):
+        self.peek()
+        while True:
+            m = self._SCALAR_END.search(self.buf, self.pos)
+            if m or not self._fill():
+                break
+        end = m.start() if m else len(self.buf)
+        token = self.buf[self.pos:end]
+        self.pos = end
+        return json.loads(token)
+
+    def members(self):
+        """Iterate object keys; the caller must consume each value."""
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.string()
+            self.expect(':')
+            yield key
+            char = self.peek()
+            self.pos += 1
+            if char == '}':
+                return
+            if char != ',':
+                raise ValueError(f"expected ',' or '}}' at offset {self.pos}")
+
+    def elements(self):
+        """Iterate array positions; the caller must consume each value."""
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        index = 0
+        while True:
+            yield index
+            index += 1
+            char = self.peek()
+            self.pos += 1
+            if char == ']':
+                return
+            if char != ',':
+                raise ValueError(f"expected ',' or ']' at offset {self.pos}")
+
+    def value(self):
+        char = self.peek()
+        if char == '"':
+            return self.string()
+        if char == '{':
+            return {key: self.value() for key in self.members()}
+        if char == '[':
+            return [self.value() for _ in self.elements()]
+        return self._scalar()
+
+    def skip(self):
+        char = self.peek()
+        if char == '"':
+            self.string(keep=False)
+            return
+        if char not in '{[':
+            self._scalar()
+            return
+        depth = 0
+        while True:
+            m = self._CONTAINER_STOP.search(self.buf, self.pos)
+            if not m:
+                self.pos = len(self.buf)
+                if not self._fill():
+                    raise ValueError('unexpected end of JSON')
+                continue
+            if m.group() == '"':
+                self.pos = m.start()
+                self.string(keep=False)
+                continue
+            self.pos = m.end()
+            depth += 1 if m.group() in '{[' else -1
+            if depth == 0:
+                return
+
+
+def iter_notebook_code_cells(filepath):
+    """Yield (cell_index, source) for code cells of an nbformat 4 notebook.
+
+    Outputs and metadata are skipped while streaming.
+    """
+    with open(filepath, 'r', encoding='utf-8', errors='ignore') as fh:
+        stream = _JsonStream(fh)
+        for key in stream.members():
+            if key != 'cells':
+                stream.skip()
+                continue
+            for index in stream.elements():
+                cell_type, source = None, None
+                for field in stream.members():
+                    if field == 'cell_type':
+                        cell_type = stream.value()
+                    elif field == 'source':
+                        source = stream.value()
+                    else:
+                        stream.skip()
+                if cell_type == 'code' and source:
+                    yield index, ''.join(source) if isinstance(source, list) else source
+            return
+
+
+def _strip_ipython_magics(source):
+    """Blank out magics and shell escapes, keeping line numbers intact."""
+    if source.lstrip().startswith('%%'):
+        return ''
+    lines = source.split('\n')
+    for i, line in enumerate(lines):
+        stripped = line.lstrip()
+        if stripped.startswith(('%', '!')) or stripped.endswith('?'):
+            lines[i] = ''
+    return '\n'.join(lines)
+
+
+def parse_notebook_file(filepath, root_path, fingerprints=None):
+    """Parse notebook code cells like a module; locations carry a 'cell' index."""
+    rel_path = os.path.relpath(filepath, root_path)
+    module_info = {
+        'file': rel_path,
+        'docstring': '',
+        'classes': [],
+        'functions': [],
+        'imports_internal': [],
+        'imports_external': [],
+        'async_blocking': [],
+    }
+    try:
+        cells = list(iter_notebook_code_cells(filepath))
+    except (OSError, ValueError):
+        return None
 
+    for index, source in cells:
+        try:
+            tree = ast.parse(_strip_ipython_magics(source), filename=f"{filepath}#cell{index}")
+        except SyntaxError:
+            continue
+        cell_fingerprints = [] if fingerprints is not None else None
+        cell_info = _analyze_tree(tree, rel_path, root_path, cell_fingerprints)
+        for key in ('classes', 'functions', 'async_blocking'):
+            for item in cell_info[key]:
+                item['cell'] = index
+                module_info[key].append(item)
+        module_info['imports_internal'].extend(cell_info['imports_internal'])
+        module_info['imports_external'].extend(cell_info['imports_external'])
+        if fingerprints is not None:
+            for fp in cell_fingerprints:
+                fp['cell'] = index
+                fingerprints.append(fp)
+
+    module_info['imports_external'] = sorted(set(module_info['imports_external']))
+    module_info['imports_internal'] = sorted(set(module_info['imports_internal']))
     return module_info
 
 
@@ -243,6 +784,147 @@ def _get_project_packages(root_path):
     return packages
 
 
+def _atomic_write_text(path, text):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def new_checkpoint(root_path, options):
+    return {
+        'version': CHECKPOINT_VERSION,
+        'root_path': root_path,
+        'options': options,
+        'fingerprints': [] if options.get('clones') else None,
+        'structure': None,
+        'modules': [],
+        'completed_files': [],
+    }
+
+
+def load_checkpoint(path, root_path, options):
+    """Load a checkpoint for root_path and options, or None if missing, corrupt or stale.
+
+    The first line is the header; each later line is one appended batch. A
+    torn final batch from a crash mid-append is dropped and cut off the file
+    so later batches append after the last complete one.
+    """
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    end = data.rfind(b'\n') + 1
+    lines = data[:end].splitlines()
+    try:
+        header = json.loads(lines[0])
+        batches = [json.loads(line) for line in lines[1:]]
+    except (IndexError, ValueError):
+        return None
+    if header.get('version') != CHECKPOINT_VERSION or header.get('root_path') != root_path:
+        return None
+    if header.get('options') != options:
+        return None
+    checkpoint = {**new_checkpoint(root_path, options), 'structure': header.get('structure')}
+    for batch in batches:
+        checkpoint['completed_files'].extend(batch['files'])
+        checkpoint['modules'].extend(batch['modules'])
+        if checkpoint['fingerprints'] is not None:
+            checkpoint['fingerprints'].extend(batch['fingerprints'])
+    if end < len(data):
+        os.truncate(path, end)
+    return checkpoint
+
+
+def save_checkpoint(path, checkpoint):
+    """Start the checkpoint file with its header; batches are appended after it."""
+    if path:
+        header = {key: checkpoint[key] for key in ('version', 'root_path', 'options', 'structure')}
+        _atomic_write_text(path, json.dumps(header, ensure_ascii=False) + '\n')
+
+
+def append_checkpoint(path, files, modules, fingerprints):
+    """Append one batch of parsed files as a single JSON line and fsync it."""
+    if path and files:
+        line = json.dumps({'files': files, 'modules': modules, 'fingerprints': fingerprints},
+                          ensure_ascii=False)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def iter_source_files(root_path, extensions):
+    """Walk the tree in a stable order, yielding (dirpath, filename)."""
+    for dirpath, dirnames, filenames in os.walk(root_path):
+        dirnames[:] = sorted(d for d in dirnames if not should_ignore_dir(d))
+        for f in sorted(filenames):
+            if f.endswith(extensions):
+                yield dirpath, f
+
+
+def scan_modules(root_path, checkpoint, checkpoint_path=None, every=CHECKPOINT_EVERY):
+    """Parse all Python files and notebooks, recording progress in checkpoint as it goes.
+
+    Files listed in checkpoint['completed_files'] are skipped, so passing a
+    loaded checkpoint resumes an interrupted scan. Every `every` files, the
+    results parsed since the last save are appended to the checkpoint file.
+    """
+    modules = checkpoint['modules']
+    fingerprints = checkpoint['fingerprints']
+    completed = set(checkpoint['completed_files'])
+    pending = []
+    saved_modules = len(modules)
+    # Fingerprints of a file interrupted mid-parse stay out of the checkpoint.
+    saved_fingerprints = done_fingerprints = len(fingerprints) if fingerprints is not None else 0
+
+    def flush():
+        nonlocal pending, saved_modules, saved_fingerprints
+        append_checkpoint(checkpoint_path, pending, modules[saved_modules:],
+                          fingerprints[saved_fingerprints:done_fingerprints] if fingerprints is not None else None)
+        pending = []
+        saved_modules = len(modules)
+        saved_fingerprints = done_fingerprints
+
+    try:
+        for dirpath, f in iter_source_files(root_path, ('.py', '.ipynb')):
+            filepath = os.path.join(dirpath, f)
+            rel_path = os.path.relpath(filepath, root_path)
+            if rel_path in completed:
+                continue
+            parse = parse_notebook_file if f.endswith('.ipynb') else parse_python_file
+            mod = parse(filepath, root_path, fingerprints)
+            if mod:
+                modules.append(mod)
+            completed.add(rel_path)
+            checkpoint['completed_files'].append(rel_path)
+            pending.append(rel_path)
+            if fingerprints is not None:
+                done_fingerprints = len(fingerprints)
+            if every and len(pending) >= every:
+                flush()
+    except (KeyboardInterrupt, SystemExit):
+        flush()
+        raise
+
+    return modules
+
+
+def _exit_on_sigterm(signum, frame):
+    sys.exit(128 + signum)
+
+
 def extract_routes(modules):
     routes = []
     for mod in modules:
@@ -267,10 +949,34 @@ def extract_routes(modules):
                             'decorator': dec,
                             'function': f"{cls['name']}.{method['name']}",
                             'file': mod['file'],
+                            'line': method.get('line', 0),
                         })
     return routes
 
 
+def extract_async_blocking(modules, routes):
+    """Group blocking-call findings by route; non-route async code goes to 'functions'."""
+    findings = {}
+    for mod in modules:
+        for entry in mod.get('async_blocking', []):
+            findings[(mod['file'], entry['function'])] = {'file': mod['file'], **entry}
+
+    by_route = []
+    route_functions = set()
+    for route in routes:
+        key = (route['file'], route['function'])
+        if key in findings:
+            route_functions.add(key)
+            by_route.append({
+                'method': route['method'],
+                'decorator': route['decorator'],
+                **findings[key],
+            })
+
+    other = [f for key, f in findings.items() if key not in route_functions]
+    return {'routes': by_route, 'functions': other}
+
+
 def extract_models(modules):
     models = []
     for mod in modules:
@@ -456,6 +1162,13 @@ def main():
     parser = argparse.ArgumentParser(description='Scan Python codebase and generate project_map.json')
     parser.add_argument('project_path', help='Path to the project root directory')
     parser.add_argument('--output', '-o', default=None, help='Output file path (default: project_map.json in project dir)')
+    parser.add_argument('--resume', action='store_true', help='Continue from the last checkpoint')
+    parser.add_argument('--checkpoint', default=None, help='Checkpoint file path (default: <output>.checkpoint)')
+    parser.add_argument('--checkpoint-every', type=int, default=CHECKPOINT_EVERY,
+                        help=f'Files parsed between checkpoints, 0 disables (default: {CHECKPOINT_EVERY})')
+    parser.add_argument('--clones', action='store_true', help='Detect duplicated functions and classes')
+    parser.add_argument('--clone-threshold', type=float, default=CLONE_THRESHOLD,
+                        help=f'Minimum similarity for near clones (default: {CLONE_THRESHOLD})')
     args = parser.parse_args()
 
     root_path = os.path.abspath(args.project_path)
@@ -463,25 +1176,52 @@ def main():
         print(f"Error: {root_path} is not a directory", file=sys.stderr)
         sys.exit(1)
 
+    output_path = args.output or os.path.join(root_path, 'project_map.json')
+    checkpoint_path = None
+    if args.checkpoint_every > 0:
+        checkpoint_path = args.checkpoint or f"{output_path}.checkpoint"
+
+    options = {'clones': args.clones}
+    checkpoint = None
+    if args.resume:
+        checkpoint = load_checkpoint(checkpoint_path, root_path, options) if checkpoint_path else None
+        if checkpoint:
+            completed = checkpoint['completed_files']
+            print(f"Resuming: {len(completed)} files done, "
+                  f"last file {completed[-1] if completed else '-'}")
+        else:
+            print("No usable checkpoint found, starting a fresh scan")
+    if checkpoint is None:
+        checkpoint = new_checkpoint(root_path, options)
+
+    signal.signal(signal.SIGTERM, _exit_on_sigterm)
+
     print(f"Scanning: {root_path}")
 
-    structure, total_files, total_lines = scan_structure(root_path)
+    if checkpoint['structure'] is None:
+        structure, total_files, total_lines = scan_structure(root_path)
+        checkpoint['structure'] = {
+            'structure': structure,
+            'total_files': total_files,
+            'total_lines': total_lines,
+        }
+        save_checkpoint(checkpoint_path, checkpoint)
+    else:
+        structure = checkpoint['structure']['structure']
+        total_files = checkpoint['structure']['total_files']
+        total_lines = checkpoint['structure']['total_lines']
     print(f"  Structure: {sum(total_files.values())} files")
 
-    modules = []
-    for dirpath, dirnames, filenames in os.walk(root_path):
-        dirnames[:] = [d for d in dirnames if not should_ignore_dir(d)]
-        for f in filenames:
-            if f.endswith('.py'):
-                filepath = os.path.join(dirpath, f)
-                mod = parse_python_file(filepath, root_path)
-                if mod:
-                    modules.append(mod)
-    print(f"  Modules: {len(modules)} Python files parsed")
+    modules = scan_modules(root_path, checkpoint, checkpoint_path, args.checkpoint_every)
+    print(f"  Modules: {len(modules)} Python files and notebooks parsed")
 
     routes = extract_routes(modules)
     print(f"  Routes: {len(routes)} endpoints found")
 
+    async_blocking = extract_async_blocking(modules, routes)
+    print(f"  Async blocking: {len(async_blocking['routes'])} routes, "
+          f"{len(async_blocking['functions'])} other async functions")
+
     models = extract_models(modules)
     print(f"  Models: {len(models)} data models found")
 
@@ -493,6 +1233,11 @@ def main():
     frameworks = detect_frameworks(modules, deps)
     print(f"  Frameworks: {', '.join(frameworks) if frameworks else 'none detected'}")
 
+    clones = None
+    if args.clones:
+        clones = detect_clones(checkpoint['fingerprints'], args.clone_threshold)
+        print(f"  Clones: {len(clones['exact'])} exact, {len(clones['near'])} near groups")
+
     project_map = {
         'project_info': {
             'name': os.path.basename(root_path),
@@ -504,15 +1249,19 @@ def main():
         'structure': structure,
         'modules': modules,
         'routes': routes,
+        'async_blocking': async_blocking,
         'models': models,
         'dependencies': deps,
         'configs': configs,
         'infrastructure': infra,
     }
+    if clones is not None:
+        project_map['clones'] = clones
 
-    output_path = args.output or os.path.join(root_path, 'project_map.json')
     with open(output_path, 'w', encoding='utf-8') as f:
         json.dump(project_map, f, indent=2, ensure_ascii=False)
+    if checkpoint_path and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
 
     print(f"\nOutput: {output_path}")
     print(f"Summary: {len(modules)} modules, {len(routes)} routes, {len(models)} models, {len(deps)} deps")
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+validate-doc.py — Runs the structure, word-count and diagram checks in one pass.
+
+The markdown is read and tokenized once into sections, code blocks, tables
+and captions; the checks of validate-structure.py, word-counter.py and
+diagram-checker.py then run against that shared model and one combined JSON
+report is printed.
+
+Usage:
+    python3 validate-doc.py /path/to/Project_Documentation.md
+
+Exit code 0 = all checks passed (warnings allowed); 1 = any check failed.
+"""
+
+import json
+import re
+import sys
+
+# Kept in sync with validate-structure.py, word-counter.py and diagram-checker.py.
+MANDATORY_SECTIONS = [
+    "References",
+    "Solution Overview",
+    "System Architecture",
+    "Data Model & Flow",
+    "API Specification",
+    "Infrastructure & Deployment",
+    "Monitoring & Operations",
+    "Assumptions & Constraints",
+]
+
+TARGET_MIN = 4000
+TARGET_MAX = 6000
+HARD_LIMIT = 8000
+
+MIN_DIAGRAMS = 6
+REQUIRED_TYPES = {'flowchart', 'mindmap', 'sequenceDiagram'}
+FORBIDDEN_TYPES = {'C4Context', 'C4Container', 'C4Deployment', 'C4Component'}
+
+FENCE_RE = re.compile(r'^ {0,3}(`{3,}|~{3,})(.*)$')
+HEADING_RE = re.compile(r'^(#{1,6})\s+(.+?)\s*$')
+SECTION_NAME_RE = re.compile(r'^\d*\.?\s*(.+)$')
+CAPTION_RE = re.compile(r'\*Fig\s+\d+\s*:\s*.+\*')
+TABLE_CELLS_RE = re.compile(r'\|[^\n]+\|')
+WORD_RE = re.compile(r'[a-zA-Zа-яА-ЯёЁ0-9]+')
+
+
+def count_words(line):
+    """Words in a prose line, with table cells removed."""
+    return len(WORD_RE.findall(TABLE_CELLS_RE.sub('', line)))
+
+
+def tokenize(content):
+    """Split markdown into title, ## sections, code blocks, tables and captions.
+
+    Headings, table rows and captions inside fenced code blocks are treated
+    as code. Fences follow CommonMark: ``` or ~~~ runs of three or more, and
+    a block closes only on a run of the same character at least as long as
+    the opening one with nothing after it. Each code block records the
+    caption on the first non-blank line after its closing fence, if that
+    line is one.
+    """
+    doc = {'title': None, 'sections': [], 'code_blocks': [], 'tables': [], 'captions': []}
+    section = {'heading': 'Preamble', 'name': None, 'line': 1, 'words': 0}
+    total_words = 0
+    block = None
+    awaiting_caption = None
+    table = None
+
+    for number, line in enumerate(content.split('\n'), 1):
+        if block is not None:
+            fence = FENCE_RE.match(line)
+            if (fence and fence.group(1)[0] == block['fence'][0]
+                    and len(fence.group(1)) >= len(block['fence']) and not fence.group(2).strip()):
+                del block['fence']
+                block['content'] = '\n'.join(block['content']).strip()
+                doc['code_blocks'].append(block)
+                awaiting_caption = block
+                block = None
+            else:
+                block['content'].append(line)
+            continue
+
+        fence = FENCE_RE.match(line)
+        if fence and not (fence.group(1)[0] == '`' and '`' in fence.group(2)):
+            info = fence.group(2).split()
+            block = {'lang': info[0] if info else '', 'line': number, 'content': [], 'caption': None,
+                     'fence': fence.group(1)}
+            awaiting_caption = table = None
+            continue
+
+        if line.strip().startswith('|'):
+            if table is None:
+                table = {'line': number, 'rows': 0, 'section': section['heading']}
+                doc['tables'].append(table)
+            table['rows'] += 1
+        else:
+            table = None
+
+        caption = CAPTION_RE.search(line)
+        if caption:
+            doc['captions'].append({'line': number, 'text': caption.group(0)})
+        if awaiting_caption is not None and line.strip():
+            if caption:
+                awaiting_caption['caption'] = caption.group(0)
+            awaiting_caption = None
+
+        words = count_words(line)
+        total_words += words
+        heading = HEADING_RE.match(line)
+        if heading and len(heading.group(1)) == 1 and doc['title'] is None:
+            doc['title'] = heading.group(2)
+        if heading and len(heading.group(1)) == 2:
+            doc['sections'].append(section)
+            text = heading.group(2)
+            section = {'heading': text, 'name': SECTION_NAME_RE.match(text).group(1).strip(),
+                       'line': number, 'words': 0}
+        else:
+            section['words'] += words
+
+    if block is not None:  # unclosed fence runs to the end of the document
+        del block['fence']
+        block['content'] = '\n'.join(block['content']).strip()
+        block['unclosed'] = True
+        doc['code_blocks'].append(block)
+    doc['sections'].append(section)
+    if doc['sections'][0]['words'] == 0 and doc['sections'][0]['name'] is None:
+        doc['sections'].pop(0)  # empty preamble
+    doc['total_words'] = total_words
+    return doc
+
+
+def check_structure(doc):
+    found_sections = [s['name'] for s in doc['sections'] if s['name'] is not None]
+    found_lower = [s.lower() for s in found_sections]
+
+    missing = []
+    present = []
+    mandatory_indices = []
+    for section in MANDATORY_SECTIONS:
+        if section.lower() in found_lower:
+            present.append(section)
+            mandatory_indices.append((section, found_lower.index(section.lower())))
+        else:
+            missing.append(section)
+
+    order_issues = []
+    for i in range(len(mandatory_indices) - 1):
+        if mandatory_indices[i][1] > mandatory_indices[i + 1][1]:
+            order_issues.append(
+                f"'{mandatory_indices[i][0]}' appears after '{mandatory_indices[i + 1][0]}'"
+            )
+
+    return {
+        'status': 'pass' if not missing and not order_issues else 'fail',
+        'has_title': doc['title'] is not None,
+        'total_sections': len(found_sections),
+        'mandatory_present': len(present),
+        'mandatory_total': len(MANDATORY_SECTIONS),
+        'missing_sections': missing,
+        'order_issues': order_issues,
+        'all_sections': found_sections,
+    }
+
+
+def check_words(doc):
+    total = doc['total_words']
+    if total < TARGET_MIN:
+        status, message = 'warn', f"Below target minimum ({total} < {TARGET_MIN})"
+    elif total > HARD_LIMIT:
+        status, message = 'fail', f"Exceeds hard limit ({total} > {HARD_LIMIT})"
+    elif total > TARGET_MAX:
+        status, message = 'warn', f"Above target maximum ({total} > {TARGET_MAX}), within hard limit"
+    else:
+        status, message = 'pass', f"Word count within target range ({TARGET_MIN}-{TARGET_MAX})"
+    return {
+        'status': status,
+        'message': message,
+        'total_words': total,
+        'target_min': TARGET_MIN,
+        'target_max': TARGET_MAX,
+        'hard_limit': HARD_LIMIT,
+        'sections': [{'section': s['heading'], 'words': s['words']} for s in doc['sections']],
+    }
+
+
+def check_diagrams(doc):
+    diagrams = []
+    for block in doc['code_blocks']:
+        if block['lang'] != 'mermaid':
+            continue
+        first_line = block['content'].split('\n')[0].strip()
+        diagrams.append({
+            'type': first_line.split()[0] if first_line else 'unknown',
+            'line': block['line'],
+            'caption': block['caption'],
+        })
+    types_found = {d['type'] for d in diagrams}
+
+    errors = []
+    if len(diagrams) < MIN_DIAGRAMS:
+        errors.append(f"Need at least {MIN_DIAGRAMS} diagrams, found {len(diagrams)}")
+    missing_types = sorted(REQUIRED_TYPES - types_found)
+    if missing_types:
+        errors.append(f"Missing required diagram types: {', '.join(missing_types)}")
+    forbidden_found = sorted(FORBIDDEN_TYPES & types_found)
+    if forbidden_found:
+        errors.append(f"Forbidden diagram types used: {', '.join(forbidden_found)}")
+    caption_issues = [f"Diagram {i} ({d['type']}): missing italic caption '*Fig N: ...*'"
+                      for i, d in enumerate(diagrams, 1) if d['caption'] is None]
+
+    if errors:
+        status = 'fail'
+    elif caption_issues:
+        status = 'warn'
+    else:
+        status = 'pass'
+    return {
+        'status': status,
+        'count': len(diagrams),
+        'diagrams': diagrams,
+        'missing_types': missing_types,
+        'forbidden_types': forbidden_found,
+        'errors': errors,
+        'caption_issues': caption_issues,
+    }
+
+
+def validate(filepath):
+    try:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            content = f.read()
+    except OSError as e:
+        return {'status': 'error', 'message': str(e)}
+
+    doc = tokenize(content)
+    checks = {
+        'structure': check_structure(doc),
+        'words': check_words(doc),
+        'diagrams': check_diagrams(doc),
+    }
+    failed = [name for name, result in checks.items() if result['status'] == 'fail']
+    return {
+        'status': 'fail' if failed else 'pass',
+        'failed_checks': failed,
+        **checks,
+        'document': {
+            'sections': len(doc['sections']),
+            'code_blocks': len(doc['code_blocks']),
+            'tables': len(doc['tables']),
+            'captions': len(doc['captions']),
+            'unclosed_code_block_line': next((b['line'] for b in doc['code_blocks'] if b.get('unclosed')), None),
+        },
+    }
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: validate-doc.py <path-to-markdown>", file=sys.stderr)
+        sys.exit(1)
+
+    result = validate(sys.argv[1])
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    sys.exit(0 if result['status'] == 'pass' else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,92 +1,5 @@
-#!/usr/bin/env python3#!/usr/bin/env python3
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-    sys.exit(0 if success else 1)    success = validate(sys.argv[1])        sys.exit(1)        print(f"Usage: {sys.argv[0]} <path-to-markdown>")    if len(sys.argv) != 2:if __name__ == '__main__':        return True        print("\nPASS: All required sections present")    else:        return False        print(f"\nFAIL: {len(missing)} required section(s) missing")    if missing:            print("WARN: Sections are out of expected order")        if actual_order != expected_order:        expected_order = [s for s in req_order if s in found_normalized]        actual_order = [s for s in found_normalized if s in req_order]        req_order = [normalize(r) for r in REQUIRED_SECTIONS]    if found_sections:        print(f"  MISSING  {s}")    for s in missing:        print(f"  OK  {s}")    for s in present:    print(f"Sections found: {len(present)}/{len(REQUIRED_SECTIONS)}")            missing.append(req)        else:            present.append(req)        if req_norm in found_normalized:        req_norm = normalize(req)    for req in REQUIRED_SECTIONS:    present = []    missing = []        print("WARN: Document missing H1 title")    if not has_title:    has_title = bool(re.match(r'^#\s+', content))    found_normalized = [normalize(s) for s in found_sections]    found_sections = extract_h2_sections(content)        return False        print(f"FAIL: File not found: {filepath}")    except FileNotFoundError:            content = f.read()        with open(filepath, 'r', encoding='utf-8') as f:    try:def validate(filepath):    return re.sub(r'[^a-z0-9]', '', title.lower())    """Normalize section title for comparison."""def normalize(title):    return [m.group(1).strip() for m in pattern.finditer(content)]    pattern = re.compile(r'^##\s+\d*\.?\s*(.+)$', re.MULTILINE)    """Extract all ## headings from the document."""def extract_h2_sections(content):]    "Assumptions & Constraints",    "Monitoring & Operations",    "Infrastructure & Deployment",    "API Specification",    "Data Model & Flow",    "System Architecture",    "Solution Overview",    "References",REQUIRED_SECTIONS = [import sysimport re"""    python3 validate-structure.py /path/to/Project_Documentation.mdUsage:contains all 8 mandatory sections in the correct order.validate-structure.py — Checks that Project_Documentation.md""""""
+#!/usr/bin/env python3
+"""
 validate-structure.py — Checks that Project_Documentation.md contains
 all 8 mandatory sections in the correct order.
 
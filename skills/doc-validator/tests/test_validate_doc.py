@@ -0,0 +1,61 @@
+"""Tests for the fenced-code handling of validate-doc.py."""
+
+import importlib.util
+import os
+import unittest
+
+VALIDATE_DOC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            "scripts", "validate-doc.py")
+
+
+def load_validate_doc():
+    spec = importlib.util.spec_from_file_location("validate_doc", VALIDATE_DOC)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def section_names(doc):
+    return [s['name'] for s in doc['sections'] if s['name']]
+
+
+class FenceTest(unittest.TestCase):
+    def setUp(self):
+        self.validate_doc = load_validate_doc()
+
+    def tokenize(self, *lines):
+        return self.validate_doc.tokenize("\n".join(lines))
+
+    def test_closing_fence_longer_than_opening(self):
+        doc = self.tokenize("## References", "```mermaid", "flowchart TD", "````",
+                            "*Fig 1: Flow*", "## Solution Overview", "one two three")
+        self.assertEqual(section_names(doc), ["References", "Solution Overview"])
+        self.assertEqual(doc['code_blocks'][0]['caption'], "*Fig 1: Flow*")
+        self.assertEqual(doc['sections'][-1]['words'], 3)
+
+    def test_tilde_fence(self):
+        doc = self.tokenize("## References", "~~~mermaid", "mindmap", "~~~", "## Solution Overview")
+        self.assertEqual(section_names(doc), ["References", "Solution Overview"])
+        self.assertEqual(doc['code_blocks'][0]['lang'], "mermaid")
+
+    def test_closing_fence_with_trailing_whitespace(self):
+        doc = self.tokenize("```python", "x = 1", "```   ", "## References")
+        self.assertEqual(section_names(doc), ["References"])
+
+    def test_shorter_or_other_fence_does_not_close(self):
+        doc = self.tokenize("````markdown", "```", "## Not a section", "```", "~~~", "````", "## References")
+        self.assertEqual(section_names(doc), ["References"])
+        self.assertIn("## Not a section", doc['code_blocks'][0]['content'])
+
+    def test_fence_with_info_text_does_not_close(self):
+        doc = self.tokenize("```", "``` still code", "## Not a section", "```", "## References")
+        self.assertEqual(section_names(doc), ["References"])
+
+    def test_unclosed_fence_is_reported(self):
+        doc = self.tokenize("## References", "```python", "## Swallowed")
+        self.assertTrue(doc['code_blocks'][0]['unclosed'])
+        self.assertEqual(section_names(doc), ["References"])
+
+
+if __name__ == "__main__":
+    unittest.main()
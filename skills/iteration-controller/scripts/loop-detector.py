@@ -3,14 +3,85 @@
 
 Analyzes workflow state history to detect repeated issues
 across Critic review iterations and prevent infinite loops.
+
+Repeats are searched across all earlier iterations. Each issue gets a MinHash
+signature over character shingles; locality-sensitive hashing on signature
+bands yields candidate pairs in near-linear time, and only candidates are
+confirmed with the SequenceMatcher ratio against --threshold.
+
+'check' keeps extracted issues, their signatures and the matches found in
+workflow_state.loops.json, together with how far it has read the state
+history, so each call only processes new history entries and compares only
+the issues they add.
+
+'forecast' fits the per-iteration critical, major and minor counts and the
+rate at which issues survive into the next iteration, and estimates how many
+more reviews it takes to reach an approvable state (no critical or major
+issues).
 """
 
 import argparse
+import hashlib
 import json
+import math
 import os
+import random
 import re
+import struct
 import sys
+import tempfile
+import time
+from collections import defaultdict
+from contextlib import contextmanager
 from difflib import SequenceMatcher
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: read without the state lock
+    fcntl = None
+
+SIMILARITY_THRESHOLD = 0.7
+SHINGLE_SIZE = 3
+MINHASH_BANDS = 16
+MINHASH_ROWS = 2
+MAX_BUCKET = 1000
+CACHE_VERSION = 1
+LOCK_TIMEOUT = 30.0
+LOCK_BACKOFF_INITIAL = 0.01
+LOCK_BACKOFF_MAX = 0.5
+SEVERITIES = ("critical", "major", "minor")
+BLOCKING_SEVERITIES = ("critical", "major")
+
+
+@contextmanager
+def state_read_lock(folder: str, timeout: float = LOCK_TIMEOUT):
+    """Hold state-tracker's lock file shared while reading state and history.
+
+    state-tracker takes it exclusively to append events and to move the
+    journal into the history archive, so a shared holder never sees a
+    snapshot half way through.
+    """
+    if fcntl is None or not os.path.isdir(folder):
+        yield  # load_state reports the missing folder
+        return
+    with open(os.path.join(folder, ".workflow_state.lock"), "a") as lock_file:
+        deadline = time.monotonic() + timeout
+        delay = LOCK_BACKOFF_INITIAL
+        while True:
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_SH | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    print(f"Error: Timed out after {timeout}s waiting for lock on {folder}", file=sys.stderr)
+                    sys.exit(1)
+                time.sleep(delay * random.uniform(0.5, 1.5))
+                delay = min(delay * 2, LOCK_BACKOFF_MAX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
 
 
 def load_state(folder: str) -> dict:
@@ -22,32 +93,38 @@ def load_state(folder: str) -> dict:
         return json.load(f)
 
 
+def apply_history_entry(iterations: dict, current_iteration: int, event: str) -> tuple[int, Optional[str]]:
+    """Fold one history event into iterations; return the current iteration and any new issue."""
+    # Track iteration increments
+    iter_match = re.search(r"Iteration incremented to (\d+)", event)
+    if iter_match:
+        current_iteration = int(iter_match.group(1))
+    # Track verdicts (they contain implicit iteration info)
+    verdict_match = re.search(r"Verdict set: (APPROVED|CONDITIONAL|REJECTED)", event)
+    if verdict_match and current_iteration > 0:
+        if current_iteration not in iterations:
+            iterations[current_iteration] = {
+                "verdict": verdict_match.group(1),
+                "issues": []
+            }
+        else:
+            iterations[current_iteration]["verdict"] = verdict_match.group(1)
+    # Track issues if logged
+    issue_match = re.search(r"Issue: (.+)", event)
+    if issue_match and current_iteration > 0:
+        if current_iteration not in iterations:
+            iterations[current_iteration] = {"verdict": None, "issues": []}
+        iterations[current_iteration]["issues"].append(issue_match.group(1))
+        return current_iteration, issue_match.group(1)
+    return current_iteration, None
+
+
 def extract_issues_from_history(history: list) -> dict:
     """Extract Critic issues from history events, grouped by iteration."""
     iterations = {}
     current_iteration = 0
     for entry in history:
-        event = entry.get("event", "")
-        # Track iteration increments
-        iter_match = re.search(r"Iteration incremented to (\d+)", event)
-        if iter_match:
-            current_iteration = int(iter_match.group(1))
-        # Track verdicts (they contain implicit iteration info)
-        verdict_match = re.search(r"Verdict set: (APPROVED|CONDITIONAL|REJECTED)", event)
-        if verdict_match and current_iteration > 0:
-            if current_iteration not in iterations:
-                iterations[current_iteration] = {
-                    "verdict": verdict_match.group(1),
-                    "issues": []
-                }
-            else:
-                iterations[current_iteration]["verdict"] = verdict_match.group(1)
-        # Track issues if logged
-        issue_match = re.search(r"Issue: (.+)", event)
-        if issue_match and current_iteration > 0:
-            if current_iteration not in iterations:
-                iterations[current_iteration] = {"verdict": None, "issues": []}
-            iterations[current_iteration]["issues"].append(issue_match.group(1))
+        current_iteration, _ = apply_history_entry(iterations, current_iteration, entry.get("event", ""))
     return iterations
 
 
@@ -56,20 +133,82 @@ def similarity(a: str, b: str) -> float:
     return SequenceMatcher(None, a.lower(), b.lower()).ratio()
 
 
-def find_repeated_issues(iterations: dict, threshold: float = 0.7) -> list:
-    """Find issues that appear in 2+ consecutive iterations."""
+def issue_shingles(text: str) -> set:
+    """Character shingles of the lowercased, whitespace-collapsed issue text."""
+    normalized = f" {' '.join(text.lower().split())} "
+    if len(normalized) <= SHINGLE_SIZE:
+        return {normalized}
+    return {normalized[i:i + SHINGLE_SIZE] for i in range(len(normalized) - SHINGLE_SIZE + 1)}
+
+
+def minhash_signature(shingles: set) -> list:
+    columns = []
+    for shingle in shingles:
+        data = shingle.encode("utf-8")
+        digest = (hashlib.blake2b(data, digest_size=64).digest()
+                  + hashlib.blake2b(data, digest_size=64, salt=b"issues").digest())
+        columns.append(struct.unpack("<32I", digest))
+    return [min(values) for values in zip(*columns)]
+
+
+def band_keys(signature: list) -> list:
+    return [(band, tuple(signature[band * MINHASH_ROWS:(band + 1) * MINHASH_ROWS]))
+            for band in range(MINHASH_BANDS)]
+
+
+def best_match(text: str, iteration: int, keys: list, buckets: dict, threshold: float) -> Optional[dict]:
+    """Best-scoring issue from an earlier iteration that shares an LSH band with text."""
+    best = None
+    seen = set()
+    for key in keys:
+        if best and best[2] == 1.0:
+            break
+        for candidate in buckets.get(key, ())[:MAX_BUCKET]:
+            if candidate in seen or candidate[0] >= iteration:
+                continue
+            seen.add(candidate)
+            matcher = SequenceMatcher(None, text.lower(), candidate[1].lower())
+            if matcher.real_quick_ratio() < threshold or matcher.quick_ratio() < threshold:
+                continue  # both are upper bounds of ratio()
+            score = matcher.ratio()
+            if score >= threshold and (best is None or score > best[2]):
+                best = (candidate[0], candidate[1], score)
+    if best is None:
+        return None
+    return {
+        "iteration": iteration,
+        "issue": text,
+        "previous_iteration": best[0],
+        "previous_issue": best[1],
+        "similarity": round(best[2], 2),
+    }
+
+
+def match_repeats(iterations: dict, threshold: float = SIMILARITY_THRESHOLD) -> list:
+    """Match each issue against issues from all earlier iterations.
+
+    Returns one entry per repeated issue with the earlier issue it matches
+    best. Issues within the same iteration are never compared.
+    """
+    buckets = defaultdict(list)
+    matches = []
+    for number in sorted(iterations):
+        for text in iterations[number].get("issues", []):
+            keys = band_keys(minhash_signature(issue_shingles(text)))
+            match = best_match(text, number, keys, buckets, threshold)
+            if match:
+                matches.append(match)
+            for key in keys:
+                buckets[key].append((number, text))
+    return matches
+
+
+def find_repeated_issues(iterations: dict, threshold: float = SIMILARITY_THRESHOLD) -> list:
+    """Find issues that repeat an issue from any earlier iteration."""
     repeated = []
-    sorted_iters = sorted(iterations.keys())
-    if len(sorted_iters) < 2:
-        return []
-    for i in range(1, len(sorted_iters)):
-        prev_issues = iterations[sorted_iters[i - 1]].get("issues", [])
-        curr_issues = iterations[sorted_iters[i]].get("issues", [])
-        for curr in curr_issues:
-            for prev in prev_issues:
-                if similarity(curr, prev) >= threshold:
-                    if curr not in repeated:
-                        repeated.append(curr)
+    for match in match_repeats(iterations, threshold):
+        if match["issue"] not in repeated:
+            repeated.append(match["issue"])
     return repeated
 
 
@@ -86,13 +225,155 @@ def calculate_progress(iterations: dict) -> float:
     return round(resolved / first_count, 2)
 
 
+def get_cache_path(folder: str) -> str:
+    return os.path.join(folder, "workflow_state.loops.json")
+
+
+def new_cache(state: dict, threshold: float, source: str) -> dict:
+    return {
+        "version": CACHE_VERSION,
+        "started": state.get("started"),
+        "threshold": threshold,
+        "source": source,
+        "history_offset": 0,
+        "archive_offset": 0,
+        "last_seq": 0,
+        "current_iteration": 0,
+        "iterations": {},
+        "issues": [],
+        "matches": [],
+    }
+
+
+def load_cache(folder: str, state: dict, threshold: float, source: str) -> dict:
+    """Load the persisted check state, starting over if the workflow or settings changed."""
+    try:
+        with open(get_cache_path(folder), "r") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return new_cache(state, threshold, source)
+    if (cache.get("version") != CACHE_VERSION or cache.get("started") != state.get("started")
+            or cache.get("threshold") != threshold or cache.get("source") != source):
+        return new_cache(state, threshold, source)
+    cache["iterations"] = {int(k): v for k, v in cache["iterations"].items()}
+    return cache
+
+
+def save_cache(folder: str, cache: dict) -> None:
+    path = get_cache_path(folder)
+    fd, tmp_path = tempfile.mkstemp(prefix=".workflow_state.loops.", suffix=".tmp", dir=folder)
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(cache, f)
+        if os.path.exists(path):
+            os.chmod(tmp_path, os.stat(path).st_mode & 0o777)
+        else:
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(tmp_path, 0o666 & ~umask)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def read_new_history(folder: str, state: dict, cache: dict) -> list:
+    """History entries added since the cache was last saved.
+
+    Journaled state (state-tracker) is read from the byte offset reached in
+    workflow_state.history.jsonl plus journal events past the last seen seq;
+    older single-file state uses an index into its history list.
+    """
+    if cache["source"] == "view":
+        history = state.get("history", [])
+        entries = history[cache["history_offset"]:]
+        cache["history_offset"] = len(history)
+        return entries
+
+    entries = []
+    archive = os.path.join(folder, "workflow_state.history.jsonl")
+    if os.path.exists(archive):
+        with open(archive, "rb") as f:
+            f.seek(cache["archive_offset"])
+            data = f.read()
+        end = data.rfind(b"\n") + 1
+        cache["archive_offset"] += end
+        for line in data[:end].splitlines():
+            entry = json.loads(line)
+            if entry.get("seq", 0) == 0 or entry["seq"] > cache["last_seq"]:
+                entries.append(entry)
+    journal = os.path.join(folder, "workflow_state.journal.jsonl")
+    if os.path.exists(journal):
+        with open(journal, "r") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # torn final line
+                if entry["seq"] > cache["last_seq"]:
+                    entries.append(entry)
+    cache["last_seq"] = max([cache["last_seq"]] + [e.get("seq", 0) for e in entries])
+    return entries
+
+
+def update_cache(cache: dict, entries: list, threshold: float) -> None:
+    """Fold new history into the cache and match only the issues it adds."""
+    buckets = defaultdict(list)
+    for issue in cache["issues"]:
+        for key in band_keys(issue["signature"]):
+            buckets[key].append((issue["iteration"], issue["text"]))
+    for entry in entries:
+        current, text = apply_history_entry(cache["iterations"], cache["current_iteration"],
+                                            entry.get("event", ""))
+        cache["current_iteration"] = current
+        if text is None:
+            continue
+        signature = minhash_signature(issue_shingles(text))
+        keys = band_keys(signature)
+        match = best_match(text, current, keys, buckets, threshold)
+        if match:
+            cache["matches"].append(match)
+        cache["issues"].append({"iteration": current, "text": text, "signature": signature})
+        for key in keys:
+            buckets[key].append((current, text))
+
+
+def load_issue_cache(folder: str, threshold: float, no_cache: bool = False,
+                     lock_timeout: float = LOCK_TIMEOUT) -> tuple[dict, dict]:
+    """Load state and bring the issue cache up to date with its history.
+
+    State, archive and journal are read under one shared state lock so a
+    concurrent snapshot cannot move events between the two files mid-read.
+    """
+    with state_read_lock(folder, lock_timeout):
+        state = load_state(folder)
+        journaled = any(os.path.exists(os.path.join(folder, name))
+                        for name in ("workflow_state.journal.jsonl", "workflow_state.history.jsonl"))
+        source = "journal" if journaled else "view"
+        if no_cache:
+            cache = new_cache(state, threshold, source)
+        else:
+            cache = load_cache(folder, state, threshold, source)
+        entries = read_new_history(folder, state, cache)
+    update_cache(cache, entries, threshold)
+    if not no_cache:
+        save_cache(folder, cache)
+    return state, cache
+
+
 def cmd_check(args):
-    state = load_state(args.folder)
+    state, cache = load_issue_cache(args.folder, args.threshold, args.no_cache, args.lock_timeout)
     iteration = state.get("iteration", 0)
     max_iterations = state.get("max_iterations", 5)
-    history = state.get("history", [])
-    iterations = extract_issues_from_history(history)
-    repeated = find_repeated_issues(iterations)
+    iterations = cache["iterations"]
+    matches = cache["matches"]
+    repeated = []
+    for match in matches:
+        if match["issue"] not in repeated:
+            repeated.append(match["issue"])
     progress = calculate_progress(iterations)
     loop_detected = len(repeated) > 0 and iteration >= 2
     if loop_detected:
@@ -108,20 +389,219 @@ def cmd_check(args):
         "max_iterations": max_iterations,
         "loop_detected": loop_detected,
         "repeated_issues": repeated,
+        "repeat_matches": matches,
         "progress_score": progress,
         "recommendation": recommendation
     }
     print(json.dumps(result, indent=2))
 
 
+def issue_severity(text: str) -> str:
+    """Severity from a 'CRITICAL: ...' style prefix; unlabelled issues count as major."""
+    m = re.match(r"\s*\[?(CRITICAL|MAJOR|MINOR)\b", text, re.IGNORECASE)
+    return m.group(1).lower() if m else "major"
+
+
+def issue_text(item) -> Optional[str]:
+    """Text of one entry from a logger verdict's issues array."""
+    if isinstance(item, dict):
+        text = item.get("issue") or item.get("description")
+        return str(text) if text else None
+    return str(item) if item else None
+
+
+def load_reviews(folder: str, cache: dict) -> tuple[list, str, list]:
+    """Per-iteration severity counts of reviewed iterations, oldest first, plus their issues.
+
+    Verdict records in workflow_log.jsonl carry the Critic's counts and issue
+    table; without a log, issues from the state history are classified by
+    their prefix. Issues are returned as {iteration, text, signature}.
+    """
+    counts = {}
+    logged_issues = {}
+    path = os.path.join(folder, "workflow_log.jsonl")
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get("type") == "verdict":
+                    number = int(record["iteration"])
+                    counts[number] = {
+                        "iteration": number,
+                        "verdict": record.get("verdict"),
+                        **{key: int(record.get(key) or 0) for key in SEVERITIES},
+                    }
+                    items = record.get("issues") if isinstance(record.get("issues"), list) else []
+                    logged_issues[number] = [text for text in map(issue_text, items) if text]
+    if counts:
+        issues = [{"iteration": number, "text": text, "signature": minhash_signature(issue_shingles(text))}
+                  for number in sorted(logged_issues) for text in logged_issues[number]]
+        return [counts[n] for n in sorted(counts)], "workflow_log", issues
+    iterations = cache["iterations"]
+    for number in sorted(iterations):
+        data = iterations[number]
+        if data.get("verdict") is None:
+            continue
+        entry = {"iteration": number, "verdict": data["verdict"], **{key: 0 for key in SEVERITIES}}
+        for text in data.get("issues", []):
+            entry[issue_severity(text)] += 1
+        counts[number] = entry
+    return [counts[n] for n in sorted(counts)], "state_history", cache["issues"]
+
+
+def decay_rate(points: list) -> Optional[float]:
+    """Per-iteration factor of a log-linear least-squares fit to (iteration, count)."""
+    if len(points) < 2:
+        return None
+    xs = [x for x, _ in points]
+    ys = [math.log(y + 0.5) for _, y in points]
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    denom = sum((x - mean_x) ** 2 for x in xs)
+    if denom == 0:
+        return None
+    slope = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / denom
+    return math.exp(slope)
+
+
+def review_numbers(issues: list, reviewed: list) -> list:
+    return sorted(set(reviewed) | {issue["iteration"] for issue in issues})
+
+
+def carried_issues(issues: list, reviewed: list, threshold: float) -> list:
+    """Match each issue against the previous reviewed iteration only.
+
+    Unlike repeat_matches, which keeps the best match from any earlier
+    iteration, this links consecutive reviews so survival and streaks are
+    measured per step.
+    """
+    by_iteration = defaultdict(list)
+    for issue in issues:
+        by_iteration[issue["iteration"]].append(issue)
+    numbers = review_numbers(issues, reviewed)
+    links = []
+    for previous, current in zip(numbers, numbers[1:]):
+        buckets = defaultdict(list)
+        for issue in by_iteration[previous]:
+            for key in band_keys(issue["signature"]):
+                buckets[key].append((previous, issue["text"]))
+        for issue in by_iteration[current]:
+            match = best_match(issue["text"], current, band_keys(issue["signature"]), buckets, threshold)
+            if match:
+                links.append(match)
+    return links
+
+
+def issue_persistence(issues: list, reviewed: list, links: list) -> Optional[float]:
+    """Share of issues that reappear in the next reviewed iteration."""
+    numbers = review_numbers(issues, reviewed)
+    total = sum(len({i["text"] for i in issues if i["iteration"] == n}) for n in numbers[:-1])
+    survived = len({(link["previous_iteration"], link["previous_issue"]) for link in links})
+    return survived / total if total else None
+
+
+def persistent_issues(links: list, latest: Optional[int]) -> list:
+    """Issues of the latest reviewed iteration with how many consecutive reviews raised them."""
+    chains = {}
+    for link in links:  # ordered by iteration
+        since, length = chains.get((link["previous_iteration"], link["previous_issue"]),
+                                   (link["previous_iteration"], 1))
+        chains[(link["iteration"], link["issue"])] = (since, length + 1)
+    result = [{"issue": issue, "since_iteration": since, "iterations": length}
+              for (number, issue), (since, length) in chains.items() if number == latest]
+    return sorted(result, key=lambda item: -item["iterations"])
+
+
+def iterations_to_zero(count: int, rate: Optional[float]) -> Optional[int]:
+    """Iterations until the expected count drops below 0.5 at a constant decay rate."""
+    if count == 0:
+        return 0
+    if rate is None or rate >= 1:
+        return None
+    return max(1, math.ceil(math.log(0.5 / count) / math.log(rate)))
+
+
+def build_forecast(state: dict, cache: dict, folder: str) -> dict:
+    iteration = state.get("iteration", 0)
+    max_iterations = state.get("max_iterations", 5)
+    counts, source, issues = load_reviews(folder, cache)
+    reviewed = [c["iteration"] for c in counts]
+    links = carried_issues(issues, reviewed, cache["threshold"])
+    persistence = issue_persistence(issues, reviewed, links)
+    numbers = review_numbers(issues, reviewed)
+    rates = {key: decay_rate([(c["iteration"], c[key]) for c in counts]) for key in SEVERITIES}
+    remaining = None
+    approval_iteration = None
+    last = counts[-1] if counts else None
+    if last and last["verdict"] == "APPROVED":
+        remaining = 0
+        approval_iteration = last["iteration"]
+        recommendation = "APPROVED - no further iterations needed"
+    elif len(counts) < 2:
+        recommendation = "CONTINUE - at least 2 reviewed iterations are needed to forecast"
+    else:
+        per_severity = []
+        for key in BLOCKING_SEVERITIES:
+            rate = rates[key]
+            if rate is not None and persistence is not None:
+                rate = max(rate, persistence)  # surviving issues bound how fast the count can fall
+            per_severity.append(iterations_to_zero(last[key], rate))
+        if None not in per_severity:
+            remaining = max(per_severity)
+            approval_iteration = last["iteration"] + remaining
+        if remaining is None:
+            recommendation = "ESCALATE EARLY - blocking issues are not decreasing"
+        elif approval_iteration > max_iterations:
+            recommendation = (f"ESCALATE EARLY - approval forecast at iteration {approval_iteration}, "
+                              f"after max {max_iterations}")
+        else:
+            recommendation = f"CONTINUE - approval forecast at iteration {approval_iteration}"
+    return {
+        "iteration": iteration,
+        "max_iterations": max_iterations,
+        "severity_source": source,
+        "severity_counts": counts,
+        "decay_rates": {key: (round(rate, 2) if rate is not None else None) for key, rate in rates.items()},
+        "persistence": round(persistence, 2) if persistence is not None else None,
+        "persistent_issues": persistent_issues(links, numbers[-1] if numbers else None),
+        "estimated_iterations_remaining": remaining,
+        "forecast_approval_iteration": approval_iteration,
+        "recommendation": recommendation,
+    }
+
+
+def cmd_forecast(args):
+    state, cache = load_issue_cache(args.folder, args.threshold, args.no_cache, args.lock_timeout)
+    print(json.dumps(build_forecast(state, cache, args.folder), indent=2))
+
+
 def main():
     parser = argparse.ArgumentParser(description="Design-review loop detector")
     subparsers = parser.add_subparsers(dest="command", required=True)
 
     p_check = subparsers.add_parser("check", help="Check for iteration loops")
     p_check.add_argument("--folder", required=True, help="Path to generated_docs folder")
+    p_check.add_argument("--threshold", type=float, default=SIMILARITY_THRESHOLD,
+                         help=f"Minimum similarity ratio for a repeated issue (default: {SIMILARITY_THRESHOLD})")
+    p_check.add_argument("--no-cache", action="store_true",
+                         help="Recompute from the full history without reading or writing the cache")
+    p_check.add_argument("--lock-timeout", type=float, default=LOCK_TIMEOUT,
+                         help=f"Seconds to wait for the state lock (default: {LOCK_TIMEOUT:g})")
     p_check.set_defaults(func=cmd_check)
 
+    p_forecast = subparsers.add_parser("forecast", help="Forecast iterations remaining until approval")
+    p_forecast.add_argument("--folder", required=True, help="Path to generated_docs folder")
+    p_forecast.add_argument("--threshold", type=float, default=SIMILARITY_THRESHOLD,
+                            help=f"Minimum similarity ratio for a repeated issue (default: {SIMILARITY_THRESHOLD})")
+    p_forecast.add_argument("--no-cache", action="store_true",
+                            help="Recompute from the full history without reading or writing the cache")
+    p_forecast.add_argument("--lock-timeout", type=float, default=LOCK_TIMEOUT,
+                            help=f"Seconds to wait for the state lock (default: {LOCK_TIMEOUT:g})")
+    p_forecast.set_defaults(func=cmd_forecast)
+
     args = parser.parse_args()
     args.func(args)
 
@@ -0,0 +1,150 @@
+"""Tests for loop-detector.py forecast, using records written by workflow-logger."""
+
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+SKILLS_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+LOOP_DETECTOR = os.path.join(SKILLS_DIR, "iteration-controller", "scripts", "loop-detector.py")
+WORKFLOW_LOGGER = os.path.join(SKILLS_DIR, "workflow-logger", "scripts", "workflow-logger.py")
+STATE_TRACKER = os.path.join(SKILLS_DIR, "workflow-state-manager", "scripts", "state-tracker.py")
+
+
+def load_script(name, path):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_loop_detector():
+    return load_script("loop_detector", LOOP_DETECTOR)
+
+
+def issue(severity: str, text: str) -> dict:
+    return {"severity": severity, "section": "1", "issue": text, "action": "Fix it"}
+
+
+class ForecastFromLoggerTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.folder = self.tmp.name
+        self.loop_detector = load_loop_detector()
+        with open(os.path.join(self.folder, "workflow_state.json"), "w") as f:
+            json.dump({"started": "2026-01-01T00:00:00", "iteration": 3, "max_iterations": 5, "history": []}, f)
+        self.logger("init", "--project", "test")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def logger(self, *args):
+        subprocess.run([sys.executable, WORKFLOW_LOGGER, args[0], "--folder", self.folder, *args[1:]],
+                       check=True, capture_output=True)
+
+    def verdict(self, iteration: int, verdict: str, issues: list):
+        counts = {key: sum(1 for i in issues if i["severity"].lower() == key) for key in ("critical", "major", "minor")}
+        self.logger("verdict", "--iteration", str(iteration), "--verdict", verdict,
+                    "--critical", str(counts["critical"]), "--major", str(counts["major"]),
+                    "--minor", str(counts["minor"]), "--issues", json.dumps(issues))
+
+    def forecast(self) -> dict:
+        state, cache = self.loop_detector.load_issue_cache(self.folder, 0.7, no_cache=True)
+        return self.loop_detector.build_forecast(state, cache, self.folder)
+
+    def test_persistence_from_logged_issues(self):
+        self.verdict(1, "REJECTED", [issue("CRITICAL", "Missing monitoring section"),
+                                     issue("CRITICAL", "Specific instances in diagram"),
+                                     issue("MAJOR", "No scaling policy described")])
+        self.verdict(2, "REJECTED", [issue("CRITICAL", "Missing monitoring section"),
+                                     issue("MAJOR", "No scaling policy described.")])
+        self.verdict(3, "CONDITIONAL", [issue("MAJOR", "Missing monitoring section"),
+                                        issue("MINOR", "Typo in title")])
+
+        result = self.forecast()
+
+        self.assertEqual(result["severity_source"], "workflow_log")
+        # 2 of 3 issues survive into iteration 2, then 1 of 2 into iteration 3.
+        self.assertEqual(result["persistence"], 0.6)
+        self.assertEqual(result["persistent_issues"], [
+            {"issue": "Missing monitoring section", "since_iteration": 1, "iterations": 3},
+        ])
+
+    def test_no_carry_over_into_clean_review(self):
+        self.verdict(1, "REJECTED", [issue("CRITICAL", "Missing monitoring section")])
+        self.verdict(2, "APPROVED", [])
+
+        result = self.forecast()
+
+        self.assertEqual(result["persistence"], 0.0)
+        self.assertEqual(result["persistent_issues"], [])
+        self.assertEqual(result["estimated_iterations_remaining"], 0)
+
+
+class CacheRefreshDuringSnapshotTest(unittest.TestCase):
+    """A snapshot that archives the journal mid-refresh must not drop events."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.folder = os.path.join(self.tmp.name, "generated_docs")
+        self.registry = os.path.join(self.tmp.name, "registry.sqlite")
+        self.loop_detector = load_loop_detector()
+        tracker = load_script("state_tracker", STATE_TRACKER)
+        subprocess.run([sys.executable, STATE_TRACKER, "init", "--folder", self.folder,
+                        "--registry", self.registry], check=True, capture_output=True)
+        # Stop one event short of the snapshot so the writer below triggers it.
+        with contextlib.redirect_stdout(io.StringIO()):
+            for n in range(tracker.SNAPSHOT_EVERY - 2):
+                tracker.record_event(self.folder, "add-research", registry=self.registry, file=f"r{n}.md")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_snapshot_between_archive_and_journal_reads(self):
+        module = self.loop_detector
+        journal = os.path.join(self.folder, "workflow_state.journal.jsonl")
+        writer_code = ("import subprocess, sys\n"
+                       "for name in ('snap.md', 'after.md'):\n"
+                       "    subprocess.run([sys.executable, *sys.argv[1:], '--file', name], check=True,\n"
+                       "                   stdout=subprocess.DEVNULL)\n")
+        writer_args = [sys.executable, "-c", writer_code, STATE_TRACKER, "add-research",
+                       "--folder", self.folder, "--registry", self.registry]
+        writers = []
+        real_open = open
+
+        def open_hook(path, *args, **kwargs):
+            # Let a writer snapshot and append after the archive has been read.
+            if path == journal and not writers:
+                writers.append(subprocess.Popen(writer_args))
+                try:
+                    writers[0].wait(timeout=2)
+                except subprocess.TimeoutExpired:
+                    pass  # blocked on the shared state lock, as it should be
+            return real_open(path, *args, **kwargs)
+
+        seen = []
+        real_update = module.update_cache
+
+        def record_entries(cache, entries, threshold):
+            seen.extend(e["seq"] for e in entries)
+            real_update(cache, entries, threshold)
+
+        with mock.patch.object(module, "update_cache", record_entries):
+            with mock.patch.object(module, "open", open_hook, create=True):
+                module.load_issue_cache(self.folder, 0.7)
+            self.assertEqual(writers[0].wait(timeout=30), 0)
+            state, cache = module.load_issue_cache(self.folder, 0.7)
+
+        self.assertEqual(state["version"], 101)
+        self.assertEqual(sorted(seen), list(range(1, state["version"] + 1)))
+        self.assertEqual(cache["last_seq"], state["version"])
+
+
+if __name__ == "__main__":
+    unittest.main()
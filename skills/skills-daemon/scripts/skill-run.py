@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""Thin client for skills-daemon.py.
+
+Usage:
+    python3 -S skill-run.py <state-tracker|workflow-logger|loop-detector|task-planner> [args...]
+
+Sends the command to the resident daemon and relays its output and exit
+code. When no daemon is listening, the script is executed directly, so
+callers can always use this entry point. Only the modules needed for the
+round trip are imported to keep client startup minimal.
+
+The client only connects to a socket owned by the current user inside a
+directory no one else can access, and sends just the environment variables
+the scripts read.
+"""
+
+import json
+import os
+import socket
+import stat
+import sys
+
+
+# Kept in sync with SKILL_SCRIPTS / FORWARDED_ENV / get_socket_path() in skills-daemon.py.
+SKILLS_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SKILL_SCRIPTS = {
+    "state-tracker": "workflow-state-manager/scripts/state-tracker.py",
+    "workflow-logger": "workflow-logger/scripts/workflow-logger.py",
+    "loop-detector": "iteration-controller/scripts/loop-detector.py",
+    "task-planner": "task-planner/scripts/task-planner.py",
+}
+
+# Environment variables the skill scripts read; nothing else leaves the client.
+FORWARDED_ENV = ("TZ", "WORKFLOW_REGISTRY")
+
+SOCKET_ENV = "SKILLS_DAEMON_SOCKET"
+SOCKET_NAME = "daemon.sock"
+CONNECT_TIMEOUT = 0.5
+
+
+def get_socket_path() -> str:
+    if os.environ.get(SOCKET_ENV):
+        return os.environ[SOCKET_ENV]
+    runtime = os.environ.get("XDG_RUNTIME_DIR") or "/tmp"
+    return os.path.join(runtime, f"skills-daemon-{os.getuid()}", SOCKET_NAME)
+
+
+def is_trusted_socket(path: str) -> bool:
+    """The socket and its directory must belong to us, and the directory must be private."""
+    uid = os.getuid()
+    try:
+        directory = os.lstat(os.path.dirname(os.path.abspath(path)))
+        sock = os.lstat(path)
+    except OSError:
+        return False
+    return (stat.S_ISDIR(directory.st_mode) and directory.st_uid == uid and not directory.st_mode & 0o077
+            and stat.S_ISSOCK(sock.st_mode) and sock.st_uid == uid)
+
+
+def option_value(argv: list[str], names: tuple) -> "str | None":
+    for i, arg in enumerate(argv):
+        for name in names:
+            if arg == name:
+                return argv[i + 1] if i + 1 < len(argv) else None
+            if name.startswith("--") and arg.startswith(name + "="):
+                return arg[len(name) + 1:]
+            if not name.startswith("--") and arg.startswith(name):
+                return arg[len(name):]  # joined short option, e.g. -b-
+    return None
+
+
+def reads_stdin(name: str, argv: list[str]) -> bool:
+    """Whether this command takes its input from stdin."""
+    if name == "workflow-logger":
+        return argv[:1] == ["batch"] and option_value(argv, ("--input",)) in (None, "-")
+    if name == "task-planner":
+        return option_value(argv, ("--batch", "-b")) == "-"
+    return False
+
+
+def run_direct(script: str, argv: list[str]) -> None:
+    os.execv(sys.executable, [sys.executable, script] + argv)
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in SKILL_SCRIPTS:
+        print(f"Usage: skill-run.py <{'|'.join(SKILL_SCRIPTS)}> [args...]", file=sys.stderr)
+        sys.exit(2)
+    name, argv = sys.argv[1], sys.argv[2:]
+    script = os.path.join(SKILLS_DIR, SKILL_SCRIPTS[name])
+
+    path = get_socket_path()
+    if not os.path.exists(path):
+        run_direct(script, argv)
+    if not is_trusted_socket(path):
+        print(f"Warning: Ignoring {path}: the socket and its directory must be owned by you "
+              f"and the directory must not be accessible to others", file=sys.stderr)
+        run_direct(script, argv)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(CONNECT_TIMEOUT)
+    try:
+        sock.connect(path)
+    except OSError:
+        sock.close()
+        run_direct(script, argv)
+
+    stdin = sys.stdin.read() if reads_stdin(name, argv) else None
+    env = {key: os.environ[key] for key in FORWARDED_ENV if key in os.environ}
+    request = {"script": name, "argv": argv, "cwd": os.getcwd(), "env": env, "stdin": stdin}
+    sock.settimeout(None)
+    sock.sendall(json.dumps(request).encode("utf-8"))
+    sock.shutdown(socket.SHUT_WR)
+    chunks = []
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    sock.close()
+    response = json.loads(b"".join(chunks).decode("utf-8"))
+    sys.stdout.write(response["stdout"])
+    sys.stderr.write(response["stderr"])
+    sys.exit(response["exit"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""Resident daemon that serves the workflow skill scripts over a Unix socket.
+
+The orchestrator calls state-tracker, workflow-logger, loop-detector and
+task-planner dozens of times per workflow, paying interpreter startup and a
+full file reload each time. 'serve' keeps those scripts imported in one
+process and runs their main() for each request; skill-run.py is the thin
+client, which falls back to executing the script directly when no daemon
+answers.
+
+Requests are handled one at a time, so commands keep their order and the
+scripts' own file locks still coordinate with direct callers. Loaders for
+state and event files are cached in memory, keyed by each file's mtime and
+size: writes go straight to disk and any change, from the daemon or an
+outside writer, invalidates the cached copy.
+
+The socket lives in a 0700 directory owned by the daemon's user, and only the
+environment variables in FORWARDED_ENV are taken from a request.
+"""
+
+import argparse
+import contextlib
+import copy
+import importlib.util
+import io
+import json
+import os
+import socket
+import socketserver
+import stat
+import subprocess
+import sys
+import time
+import traceback
+from typing import Optional
+
+
+SKILLS_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SKILL_SCRIPTS = {
+    "state-tracker": "workflow-state-manager/scripts/state-tracker.py",
+    "workflow-logger": "workflow-logger/scripts/workflow-logger.py",
+    "loop-detector": "iteration-controller/scripts/loop-detector.py",
+    "task-planner": "task-planner/scripts/task-planner.py",
+}
+
+# Loader functions to cache per script, with the files each result depends on.
+CACHED_LOADERS = {
+    "state-tracker": ("load_state", lambda m, folder: [m.get_snapshot_path(folder), m.get_journal_path(folder),
+                                                       m.get_state_path(folder)]),
+    "workflow-logger": ("load_events", lambda m, folder: [m.get_events_path(folder)]),
+    "loop-detector": ("load_state", lambda m, folder: [os.path.join(folder, "workflow_state.json")]),
+}
+
+# Environment variables the skill scripts read; requests cannot set anything else.
+FORWARDED_ENV = ("TZ", "WORKFLOW_REGISTRY")
+
+SOCKET_ENV = "SKILLS_DAEMON_SOCKET"
+SOCKET_NAME = "daemon.sock"
+IDLE_TIMEOUT = 3600.0
+CONNECT_TIMEOUT = 0.5
+
+
+def get_socket_path(path: Optional[str] = None) -> str:
+    """--socket, then $SKILLS_DAEMON_SOCKET, then a per-user directory in the runtime dir."""
+    if path:
+        return path
+    if os.environ.get(SOCKET_ENV):
+        return os.environ[SOCKET_ENV]
+    runtime = os.environ.get("XDG_RUNTIME_DIR") or "/tmp"
+    return os.path.join(runtime, f"skills-daemon-{os.getuid()}", SOCKET_NAME)
+
+
+def is_private_dir(path: str) -> bool:
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return False
+    return stat.S_ISDIR(st.st_mode) and st.st_uid == os.getuid() and not st.st_mode & 0o077
+
+
+def ensure_socket_dir(path: str) -> None:
+    """Create the socket's directory as 0700 and refuse one that others own or can enter."""
+    directory = os.path.dirname(os.path.abspath(path))
+    try:
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+    except OSError as e:
+        print(f"Error: Cannot create socket directory {directory}: {e}", file=sys.stderr)
+        sys.exit(1)
+    if not is_private_dir(directory):
+        print(f"Error: Socket directory {directory} must be owned by you and not accessible to others "
+              f"(mode 0700)", file=sys.stderr)
+        sys.exit(1)
+
+
+def get_script_path(name: str) -> str:
+    if name not in SKILL_SCRIPTS:
+        print(f"Error: Unknown skill script '{name}'. Choose from: {', '.join(SKILL_SCRIPTS)}", file=sys.stderr)
+        sys.exit(2)
+    return os.path.join(SKILLS_DIR, SKILL_SCRIPTS[name])
+
+
+def file_stamp(paths: list[str]) -> tuple:
+    stamp = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            stamp.append((path, st.st_mtime_ns, st.st_size))
+        except OSError:
+            stamp.append((path, None, None))
+    return tuple(stamp)
+
+
+def cached_loader(module, func, dependencies, cache: dict):
+    """Wrap func(folder) so repeated calls reuse the result until a dependency changes."""
+    def load(folder, *args, **kwargs):
+        key = (func.__name__, os.path.abspath(folder))
+        stamp = file_stamp(dependencies(module, folder))
+        hit = cache.get(key)
+        if hit and hit[0] == stamp:
+            return copy.deepcopy(hit[1])
+        result = func(folder, *args, **kwargs)
+        cache[key] = (stamp, copy.deepcopy(result))
+        return result
+    return load
+
+
+class SkillRunner:
+    """Imports each skill script once and runs its main() with captured I/O."""
+
+    def __init__(self):
+        self.modules = {}
+        self.cache = {}
+        self.started = time.time()
+        self.requests = 0
+
+    def module(self, name: str):
+        if name not in self.modules:
+            spec = importlib.util.spec_from_file_location(f"skill_{name.replace('-', '_')}", get_script_path(name))
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            if name in CACHED_LOADERS:
+                attr, dependencies = CACHED_LOADERS[name]
+                setattr(module, attr, cached_loader(module, getattr(module, attr), dependencies, self.cache))
+            self.modules[name] = module
+        return self.modules[name]
+
+    def run(self, request: dict) -> dict:
+        self.requests += 1
+        stdout, stderr = io.StringIO(), io.StringIO()
+        saved = (os.getcwd(), dict(os.environ), sys.argv, sys.stdin)
+        code = 0
+        try:
+            os.chdir(request.get("cwd") or saved[0])
+            env = request.get("env") or {}
+            for key in FORWARDED_ENV:
+                if key in env:
+                    os.environ[key] = str(env[key])
+                else:
+                    os.environ.pop(key, None)
+            time.tzset()
+            sys.stdin = io.StringIO(request.get("stdin") or "")
+            with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+                try:
+                    module = self.module(request["script"])
+                    sys.argv = [get_script_path(request["script"])] + list(request.get("argv", []))
+                    module.main()
+                except SystemExit as e:
+                    if isinstance(e.code, str):
+                        print(e.code, file=sys.stderr)
+                        code = 1
+                    else:
+                        code = e.code or 0
+                except Exception:
+                    traceback.print_exc()
+                    code = 1
+        finally:
+            os.chdir(saved[0])
+            os.environ.clear()
+            os.environ.update(saved[1])
+            time.tzset()
+            sys.argv, sys.stdin = saved[2], saved[3]
+        return {"exit": code, "stdout": stdout.getvalue(), "stderr": stderr.getvalue()}
+
+    def status(self) -> dict:
+        return {
+            "pid": os.getpid(),
+            "uptime_seconds": round(time.time() - self.started, 1),
+            "requests": self.requests,
+            "loaded": sorted(self.modules),
+            "cached_files": len(self.cache),
+        }
+
+
+def read_message(sock: socket.socket) -> dict:
+    chunks = []
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    return json.loads(b"".join(chunks).decode("utf-8"))
+
+
+class RequestHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        try:
+            request = read_message(self.request)
+        except ValueError as e:
+            response = {"exit": 2, "stdout": "", "stderr": f"Error: Invalid request: {e}\n"}
+        else:
+            control = request.get("control")
+            if control == "status":
+                response = self.server.runner.status()
+            elif control == "stop":
+                response = {"stopping": True}
+                self.server.stopping = True
+            else:
+                response = self.server.runner.run(request)
+        self.request.sendall(json.dumps(response).encode("utf-8"))
+
+
+class SkillsServer(socketserver.UnixStreamServer):
+    def __init__(self, path: str, idle_timeout: float):
+        self.runner = SkillRunner()
+        self.stopping = False
+        self.timeout = idle_timeout or None
+        super().__init__(path, RequestHandler)
+
+    def handle_timeout(self):
+        self.stopping = True
+
+
+def send_request(path: str, request: dict, timeout: Optional[float] = None) -> dict:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(CONNECT_TIMEOUT)
+        sock.connect(path)
+        sock.settimeout(timeout)
+        sock.sendall(json.dumps(request).encode("utf-8"))
+        sock.shutdown(socket.SHUT_WR)
+        return read_message(sock)
+
+
+def daemon_running(path: str) -> bool:
+    try:
+        send_request(path, {"control": "status"}, CONNECT_TIMEOUT)
+        return True
+    except (OSError, ValueError):
+        return False
+
+
+def cmd_serve(args):
+    path = get_socket_path(args.socket)
+    ensure_socket_dir(path)
+    if daemon_running(path):
+        print(f"Error: Daemon already running on {path}", file=sys.stderr)
+        sys.exit(1)
+    if os.path.exists(path):
+        os.remove(path)  # stale socket from a crashed daemon
+    old_umask = os.umask(0o077)
+    try:
+        server = SkillsServer(path, args.idle_timeout)
+    finally:
+        os.umask(old_umask)
+    print(f"Serving skills on {path} (pid {os.getpid()})", flush=True)
+    try:
+        while not server.stopping:
+            server.handle_request()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(path):
+            os.remove(path)
+    print("Daemon stopped")
+
+
+def cmd_start(args):
+    path = get_socket_path(args.socket)
+    ensure_socket_dir(path)
+    if daemon_running(path):
+        print(f"Daemon already running on {path}")
+        return
+    command = [sys.executable, os.path.abspath(__file__), "serve", "--socket", path,
+               "--idle-timeout", str(args.idle_timeout)]
+    subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                     stderr=subprocess.DEVNULL, start_new_session=True)
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        if daemon_running(path):
+            print(f"Daemon started on {path}")
+            return
+        time.sleep(0.05)
+    print(f"Error: Daemon did not come up on {path}", file=sys.stderr)
+    sys.exit(1)
+
+
+def cmd_stop(args):
+    path = get_socket_path(args.socket)
+    try:
+        send_request(path, {"control": "stop"}, CONNECT_TIMEOUT)
+    except (OSError, ValueError):
+        print(f"No daemon running on {path}")
+        return
+    print(f"Daemon on {path} stopping")
+
+
+def cmd_status(args):
+    path = get_socket_path(args.socket)
+    try:
+        status = send_request(path, {"control": "status"}, CONNECT_TIMEOUT)
+    except (OSError, ValueError):
+        print(json.dumps({"running": False, "socket": path}, indent=2))
+        sys.exit(1)
+    print(json.dumps({"running": True, "socket": path, **status}, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resident daemon for workflow skill scripts")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_socket_option(p):
+        p.add_argument("--socket", help=f"Unix socket path (default: ${SOCKET_ENV} or "
+                                        f"$XDG_RUNTIME_DIR/skills-daemon-<uid>/{SOCKET_NAME})")
+
+    p_serve = subparsers.add_parser("serve", help="Run the daemon in the foreground")
+    add_socket_option(p_serve)
+    p_serve.add_argument("--idle-timeout", type=float, default=IDLE_TIMEOUT,
+                         help=f"Exit after this many idle seconds, 0 for never (default: {IDLE_TIMEOUT:g})")
+    p_serve.set_defaults(func=cmd_serve)
+
+    p_start = subparsers.add_parser("start", help="Start the daemon in the background")
+    add_socket_option(p_start)
+    p_start.add_argument("--idle-timeout", type=float, default=IDLE_TIMEOUT,
+                         help=f"Exit after this many idle seconds, 0 for never (default: {IDLE_TIMEOUT:g})")
+    p_start.set_defaults(func=cmd_start)
+
+    p_stop = subparsers.add_parser("stop", help="Stop a running daemon")
+    add_socket_option(p_stop)
+    p_stop.set_defaults(func=cmd_stop)
+
+    p_status = subparsers.add_parser("status", help="Show daemon status as JSON")
+    add_socket_option(p_status)
+    p_status.set_defaults(func=cmd_status)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
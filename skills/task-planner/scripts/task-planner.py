@@ -4,24 +4,62 @@ task-planner.py — Manages TASKS.md for the Coder agent.
 
 Modes:
   --input "text"          Parse text and generate TASKS.md skeleton
-  --file path.md          Parse document and generate TASKS.md skeleton
+  --file path.md          Stream a design document and build tasks from list
+                          items under implementation-type sections
+    --max-tasks N         Cap on extracted tasks (default 40)
   --existing TASKS.md     Work with existing TASKS.md
     --status              Print progress summary
-    --complete N          Mark task N as completed
-    --progress N          Mark task N as in_progress
-    --add "description"   Add a new task
+    --complete N[,N...]   Mark tasks as completed
+    --progress N[,N...]   Mark tasks as in_progress
+    --add "description"   Add a new task (repeatable)
+      --after N[,N...]    Dependencies for tasks added with --add
+    --batch FILE|-        Apply a JSONL stream of operations
+    --plan [--json]       Dependency waves and critical path
+    --stats [--json]      Task durations and throughput from the log
+
+Dependencies are written in the task text as "(after: 2,4)".
+
+Mutating options can be combined; all changes are applied in memory and
+TASKS.md is written once, atomically, with a single log entry.
 
 Usage:
     python3 task-planner.py --input "Add user authentication with JWT"
     python3 task-planner.py --existing TASKS.md --status
     python3 task-planner.py --existing TASKS.md --complete 3
+    python3 task-planner.py --existing TASKS.md --complete 3,5,7 --progress 8
+    echo '{"op": "complete", "task": 3}' | python3 task-planner.py --existing TASKS.md --batch -
+    python3 task-planner.py --existing TASKS.md --plan
+    python3 task-planner.py --existing TASKS.md --stats
+
+Existing-mode commands keep a sidecar index (.TASKS.md.idx) mapping task
+numbers to byte offsets and status. It is trusted only while its SHA-256
+matches the file and is rebuilt otherwise.
+
+Mutating commands hold an exclusive advisory lock (.TASKS.md.lock) across
+read-modify-write, retrying with exponential backoff up to --lock-timeout,
+so parallel agents never lose each other's updates.
 """
 
 import argparse
+import hashlib
+import json
+import os
+import random
 import re
+import statistics
 import sys
-from datetime import datetime
+import tempfile
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 from pathlib import Path
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to unlocked atomic writes
+    fcntl = None
 
 
 TEMPLATE = """# Tasks: {title}
@@ -54,6 +92,41 @@ TASK_PATTERN = re.compile(
     re.MULTILINE
 )
 
+TASK_PATTERN_BYTES = re.compile(TASK_PATTERN.pattern.encode('utf-8'), re.MULTILINE)
+
+INDEX_VERSION = 1
+
+BATCH_OPS = {'complete': 'completed', 'progress': 'in_progress', 'add': None}
+
+DEPENDENCY_PATTERN = re.compile(r'\(after:\s*([\d,\s]+)\)')
+
+SIZE_WEIGHTS = {'S': 1, 'M': 2, 'L': 3}
+
+MAX_DOCUMENT_TASKS = 40
+
+HEADING_PATTERN = re.compile(r'^(#{1,6})\s+(.+)$')
+
+LIST_ITEM_PATTERN = re.compile(r'^ ?(?:[-*+]|\d+[.)])\s+(?:\[[ xX]\]\s+)?(.+)$')
+
+IMPLEMENTATION_HEADING = re.compile(
+    r'\b(implement\w*|tasks?|plan|steps?|roadmap|milestones?|deliverables?|'
+    r'work\s*items?|action\s*items?|phases?|rollout|migration|to-?do|backlog|execution)\b',
+    re.IGNORECASE
+)
+
+LOG_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+LOG_LINE_PATTERN = re.compile(
+    r'^(?:- (\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}|\d{2}:\d{2}) — |  - )(START|DONE|NOTE|BATCH)\b(?:: Task (\d+) —)?',
+    re.MULTILINE
+)
+
+GENERATED_PATTERN = re.compile(r'^\*\*Generated:\*\* (\d{4}-\d{2}-\d{2})', re.MULTILINE)
+
+LOCK_TIMEOUT = 30.0
+LOCK_BACKOFF_INITIAL = 0.01
+LOCK_BACKOFF_MAX = 0.5
+
 STATUS_MAP = {
     ' ': ('🔲', 'not_started'),
     '-': ('🔄', 'in_progress'),
@@ -68,6 +141,16 @@ EMOJI_TO_STATUS = {
 }
 
 
+def _lines_to_tasks(lines: list[str]) -> list[str]:
+    tasks_lines = []
+    for line in lines:
+        # Clean up the line for task description
+        clean = line.lstrip('0123456789.-) ').strip()
+        if clean:
+            tasks_lines.append(f"- [ ] 🔲 [M] {clean}")
+    return tasks_lines
+
+
 def generate_skeleton(text: str, source: str = "user input") -> str:
     """Generate a TASKS.md skeleton from free-form text."""
     lines = [line.strip() for line in text.strip().split('\n') if line.strip()]
@@ -76,13 +159,11 @@ def generate_skeleton(text: str, source: str = "user input") -> str:
     context = text.strip()[:300]
 
     # Generate placeholder tasks
-    tasks_lines = []
-    for i, line in enumerate(lines[:15], 1):
-        # Clean up the line for task description
-        clean = line.lstrip('0123456789.-) ').strip()
-        if clean:
-            tasks_lines.append(f"- [ ] 🔲 [M] {clean}")
+    tasks_lines = _lines_to_tasks(lines[:15])
+    return render_skeleton(title, context, tasks_lines, source)
+
 
+def render_skeleton(title: str, context: str, tasks_lines: list[str], source: str) -> str:
     if not tasks_lines:
         tasks_lines = [
             "- [ ] 🔲 [M] Analyze requirements and existing code",
@@ -99,29 +180,124 @@ def generate_skeleton(text: str, source: str = "user input") -> str:
         timestamp=now.strftime("%Y-%m-%d %H:%M"),
         context=context,
         tasks='\n'.join(tasks_lines),
-        time=now.strftime("%H:%M"),
+        time=now.strftime(LOG_TIME_FORMAT),
         source_type=source,
     )
 
 
-def parse_tasks(content: str) -> list[dict]:
-    """Parse tasks from TASKS.md content."""
+def extract_document_tasks(path: str, max_tasks: int = MAX_DOCUMENT_TASKS) -> str:
+    """Stream a design document line by line and build a TASKS.md skeleton.
+
+    Tasks come from top-level numbered/bulleted items under headings that look
+    like implementation sections (or their subsections). Memory stays bounded
+    by max_tasks regardless of document size; reading stops once the cap is hit.
+    Documents without such sections fall back to generate_skeleton's first-lines
+    behaviour.
+    """
+    title = None
+    context = []
+    context_len = 0
+    first_lines = []
+    headings = []  # stack of (level, is_implementation)
+    tasks_lines = []
+    in_fence = False
+
+    with open(path, 'r', encoding='utf-8') as f:
+        for raw in f:
+            line = raw.rstrip('\n')
+            stripped = line.strip()
+            if stripped.startswith(('```', '~~~')):
+                in_fence = not in_fence
+                continue
+            if in_fence or not stripped:
+                continue
+            if len(first_lines) < 15:
+                first_lines.append(stripped)
+
+            heading = HEADING_PATTERN.match(line)
+            if heading:
+                level = len(heading.group(1))
+                text = heading.group(2).strip().strip('#').strip()
+                if title is None:
+                    title = text
+                while headings and headings[-1][0] >= level:
+                    headings.pop()
+                inherited = bool(headings) and headings[-1][1]
+                headings.append((level, inherited or bool(IMPLEMENTATION_HEADING.search(text))))
+                continue
+            if title is None:
+                title = stripped
+
+            if headings and headings[-1][1]:
+                item = LIST_ITEM_PATTERN.match(line)
+                if item:
+                    description = item.group(1).replace('**', '').replace('__', '').strip()
+                    if description:
+                        tasks_lines.append(f"- [ ] 🔲 [M] {description}")
+                        if len(tasks_lines) >= max_tasks:
+                            print(f"Task cap ({max_tasks}) reached; remaining items skipped")
+                            break
+            elif context_len < 300 and not LIST_ITEM_PATTERN.match(line) and not stripped.startswith(('|', '>')):
+                context.append(stripped)
+                context_len += len(stripped) + 1
+
+    if not tasks_lines:
+        tasks_lines = _lines_to_tasks(first_lines)
+    return render_skeleton((title or "Untitled Task")[:60], ' '.join(context)[:300], tasks_lines, path)
+
+
+def parse_tasks(data: bytes) -> list[dict]:
+    """Parse tasks from raw TASKS.md bytes, recording each line's byte offset."""
     tasks = []
-    for i, match in enumerate(TASK_PATTERN.finditer(content), 1):
-        checkbox, emoji, size, description = match.groups()
+    for i, match in enumerate(TASK_PATTERN_BYTES.finditer(data), 1):
+        checkbox, emoji, size, description = (g.decode('utf-8') for g in match.groups())
+        end = match.end()
+        if description.endswith('\r'):
+            description = description[:-1]
+            end -= 1
         tasks.append({
             'number': i,
             'status': EMOJI_TO_STATUS.get(emoji, 'unknown'),
             'size': size,
             'description': description,
-            'raw': match.group(0),
+            'offset': match.start(),
+            'length': end - match.start(),
         })
     return tasks
 
 
-def print_status(content: str) -> None:
-    """Print progress summary from TASKS.md."""
-    tasks = parse_tasks(content)
+def get_index_path(path: Path) -> Path:
+    return path.with_name(f".{path.name}.idx")
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def load_index(path: Path, data: bytes) -> list[dict]:
+    """Return the task index for data, rebuilding it if the sidecar is stale."""
+    index_path = get_index_path(path)
+    try:
+        index = json.loads(index_path.read_text(encoding='utf-8'))
+        if index.get('version') == INDEX_VERSION and index.get('sha256') == content_hash(data):
+            return index['tasks']
+    except (OSError, ValueError, AttributeError):
+        pass
+    tasks = parse_tasks(data)
+    save_index(path, data, tasks)
+    return tasks
+
+
+def save_index(path: Path, data: bytes, tasks: list[dict]) -> None:
+    index = {'version': INDEX_VERSION, 'sha256': content_hash(data), 'tasks': tasks}
+    try:
+        write_atomic(get_index_path(path), json.dumps(index).encode('utf-8'))
+    except OSError:
+        pass
+
+
+def print_status(tasks: list[dict]) -> None:
+    """Print progress summary from parsed tasks."""
     if not tasks:
         print("No tasks found in TASKS.md")
         return
@@ -147,69 +323,494 @@ def print_status(content: str) -> None:
         print(f"  {t['number']}. {emoji} [{t['size']}] {t['description']}")
 
 
-def update_task_status(content: str, task_num: int, new_status: str) -> str:
-    """Update a task's status in TASKS.md content."""
-    tasks = parse_tasks(content)
-
-    target = None
-    for t in tasks:
-        if t['number'] == task_num:
-            target = t
-            break
-
-    if not target:
-        print(f"Error: Task {task_num} not found (total: {len(tasks)})", file=sys.stderr)
-        sys.exit(1)
-
+def format_task(status: str, size: str, description: str) -> str:
     status_symbols = {
         'completed': ('[x]', '✅'),
         'in_progress': ('[-]', '🔄'),
         'not_started': ('[ ]', '🔲'),
         'failed': ('[x]', '❌'),
     }
+    checkbox, emoji = status_symbols.get(status, ('[ ]', '🔲'))
+    return f"- {checkbox} {emoji} [{size}] {description}"
 
-    checkbox, emoji = status_symbols.get(new_status, ('[ ]', '🔲'))
-    old_line = target['raw']
-    new_line = f"- {checkbox} {emoji} [{target['size']}] {target['description']}"
 
-    updated = content.replace(old_line, new_line, 1)
+def splice(data: bytes, tasks: list[dict], offset: int, length: int, new: bytes) -> bytes:
+    """Replace data[offset:offset+length] and shift index offsets after it."""
+    delta = len(new) - length
+    if delta:
+        for t in tasks:
+            if t['offset'] > offset:
+                t['offset'] += delta
+    return data[:offset] + new + data[offset + length:]
 
-    # Add log entry
-    time_str = datetime.now().strftime("%H:%M")
-    event = 'DONE' if new_status == 'completed' else 'START' if new_status == 'in_progress' else 'NOTE'
-    log_entry = f"- {time_str} — {event}: Task {task_num} — {target['description']}"
-    updated = updated.rstrip() + f"\n{log_entry}\n"
 
-    return updated
+def append_log(data: bytes, tasks: list[dict], entries: list[str]) -> bytes:
+    """Append log lines at the end of the document."""
+    data = data.rstrip()
+    if tasks and tasks[-1]['offset'] + tasks[-1]['length'] > len(data):
+        tasks[-1]['length'] = len(data) - tasks[-1]['offset']
+    log = ''.join(f"\n{entry}" for entry in entries)
+    return data + f"{log}\n".encode('utf-8')
 
 
-def add_task(content: str, description: str, size: str = "M") -> str:
-    """Add a new task to TASKS.md."""
-    new_task = f"- [ ] 🔲 [{size}] {description}"
+def get_task(tasks: list[dict], task_num: int) -> dict:
+    if not 1 <= task_num <= len(tasks):
+        print(f"Error: Task {task_num} not found (total: {len(tasks)})", file=sys.stderr)
+        sys.exit(1)
+    return tasks[task_num - 1]
+
+
+def set_task_status(data: bytes, tasks: list[dict], task_num: int, new_status: str) -> tuple[bytes, str]:
+    """Rewrite task N's line at its indexed offset; returns (data, log event)."""
+    target = get_task(tasks, task_num)
+    new_line = format_task(new_status, target['size'], target['description']).encode('utf-8')
+    data = splice(data, tasks, target['offset'], target['length'], new_line)
+    target['length'] = len(new_line)
+    target['status'] = new_status
+
+    event = 'DONE' if new_status == 'completed' else 'START' if new_status == 'in_progress' else 'NOTE'
+    return data, f"{event}: Task {task_num} — {target['description']}"
+
 
-    # Find last task line and insert after it
-    lines = content.split('\n')
-    last_task_idx = -1
-    for i, line in enumerate(lines):
-        if TASK_PATTERN.match(line):
-            last_task_idx = i
+def insert_task(data: bytes, tasks: list[dict], description: str, size: str = "M") -> tuple[bytes, str]:
+    """Insert a task after the last one; returns (data, log event)."""
+    new_task = format_task('not_started', size, description)
 
-    if last_task_idx >= 0:
-        lines.insert(last_task_idx + 1, new_task)
+    if tasks:
+        last = tasks[-1]
+        offset = last['offset'] + last['length']
+        data = splice(data, tasks, offset, 0, f"\n{new_task}".encode('utf-8'))
+        tasks.append({
+            'number': len(tasks) + 1,
+            'status': 'not_started',
+            'size': size,
+            'description': description,
+            'offset': offset + 1,
+            'length': len(new_task.encode('utf-8')),
+        })
     else:
         # No tasks found, add after ## Tasks header
+        lines = data.decode('utf-8').split('\n')
         for i, line in enumerate(lines):
             if line.strip() == '## Tasks':
                 lines.insert(i + 2, new_task)
                 break
+        data = '\n'.join(lines).encode('utf-8')
+        tasks[:] = parse_tasks(data)
+
+    return data, f"NOTE: Added task — {description}"
+
+
+def with_dependencies(description: str, after: Optional[list[int]]) -> str:
+    if not after:
+        return description
+    return f"{description} (after: {','.join(str(n) for n in after)})"
+
+
+def task_dependencies(task: dict) -> list[int]:
+    deps = []
+    for match in DEPENDENCY_PATTERN.finditer(task['description']):
+        deps.extend(int(n) for n in re.findall(r'\d+', match.group(1)))
+    return deps
+
+
+def _find_cycle(nodes: set[int], deps: dict[int, list[int]]) -> list[int]:
+    """Follow dependencies inside an unsortable remainder until a node repeats."""
+    node = min(nodes)
+    path = []
+    seen = {}
+    while node not in seen:
+        seen[node] = len(path)
+        path.append(node)
+        node = next(d for d in deps[node] if d in nodes)
+    return path[seen[node]:] + [node]
+
+
+def plan_tasks(tasks: list[dict]) -> dict:
+    """Topologically sort unfinished tasks into parallel waves.
+
+    Completed tasks count as satisfied dependencies. The critical path is the
+    dependency chain with the largest total S/M/L weight.
+    """
+    numbers = {t['number'] for t in tasks}
+    deps = {}
+    for t in tasks:
+        deps[t['number']] = task_dependencies(t)
+        unknown = [n for n in deps[t['number']] if n not in numbers]
+        if unknown:
+            return {'error': f"Task {t['number']} depends on unknown task(s): {unknown}"}
+
+    weights = {t['number']: SIZE_WEIGHTS.get(t['size'], 2) for t in tasks}
+    completed = [t['number'] for t in tasks if t['status'] == 'completed']
+    pending = {t['number'] for t in tasks if t['status'] != 'completed'}
+    blockers = {n: {d for d in deps[n] if d in pending} for n in pending}
+    dependents = defaultdict(list)
+    for n in pending:
+        for d in blockers[n]:
+            dependents[d].append(n)
+
+    waves = []
+    finish = {}
+    critical_prev = {}
+    remaining = {n: len(blockers[n]) for n in pending}
+    ready = sorted(n for n in pending if not blockers[n])
+    while ready:
+        waves.append(ready)
+        next_ready = []
+        for n in ready:
+            prev = max(blockers[n], key=lambda d: finish[d], default=None)
+            critical_prev[n] = prev
+            finish[n] = (finish[prev] if prev else 0) + weights[n]
+            for m in dependents[n]:
+                remaining[m] -= 1
+                if remaining[m] == 0:
+                    next_ready.append(m)
+        ready = sorted(next_ready)
+
+    unsorted = pending - finish.keys()
+    if unsorted:
+        cycle = _find_cycle(unsorted, {n: list(blockers[n]) for n in unsorted})
+        return {'error': f"Dependency cycle: {' → '.join(str(n) for n in cycle)}", 'cycle': cycle}
+
+    critical_path = []
+    node = max(finish, key=finish.get, default=None)
+    while node:
+        critical_path.append(node)
+        node = critical_prev[node]
+    critical_path.reverse()
+
+    total = sum(weights[n] for n in pending)
+    critical_weight = finish[critical_path[-1]] if critical_path else 0
+    return {
+        'completed': completed,
+        'waves': waves,
+        'critical_path': critical_path,
+        'critical_path_weight': critical_weight,
+        'total_weight': total,
+        'max_parallelism': max((len(w) for w in waves), default=0),
+        'speedup': round(total / critical_weight, 2) if critical_weight else 0,
+    }
+
+
+def print_plan(tasks: list[dict], plan: dict) -> None:
+    by_number = {t['number']: t for t in tasks}
+    pending = sum(len(w) for w in plan['waves'])
+    print(f"Plan: {pending} pending task(s) in {len(plan['waves'])} wave(s), "
+          f"{len(plan['completed'])} completed")
+    for i, wave in enumerate(plan['waves'], 1):
+        print(f"\nWave {i}:")
+        for n in wave:
+            t = by_number[n]
+            print(f"  {n}. [{t['size']}] {t['description']}")
+    if plan['critical_path']:
+        path = ' → '.join(str(n) for n in plan['critical_path'])
+        print(f"\nCritical path (weight {plan['critical_path_weight']} of {plan['total_weight']}): {path}")
+        print(f"Max parallelism: {plan['max_parallelism']}, ideal speedup: {plan['speedup']}x")
+
+
+def parse_log_events(content: str) -> list[dict]:
+    """Extract timed START/DONE events from the Log section.
+
+    BATCH sub-items inherit the batch timestamp. Legacy HH:MM entries are
+    dated from the **Generated:** header, rolling over at midnight.
+    """
+    log_start = content.find('\n## Log')
+    if log_start < 0:
+        return []
+    generated = GENERATED_PATTERN.search(content)
+    day = datetime.strptime(generated.group(1), "%Y-%m-%d") if generated else None
+
+    events = []
+    current = None
+    for match in LOG_LINE_PATTERN.finditer(content, log_start):
+        stamp, event, task = match.groups()
+        if stamp and len(stamp) > 5:
+            current = datetime.strptime(stamp, LOG_TIME_FORMAT)
+            day = current.replace(hour=0, minute=0, second=0)
+        elif stamp:
+            if day is None:
+                current = None
+            else:
+                hour, minute = map(int, stamp.split(':'))
+                candidate = day.replace(hour=hour, minute=minute)
+                if current and candidate < current:
+                    day += timedelta(days=1)
+                    candidate = day.replace(hour=hour, minute=minute)
+                current = candidate
+        if task and current and event in ('START', 'DONE'):
+            events.append({'time': current, 'event': event, 'task': int(task)})
+    return events
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def _ranks(values: list[float]) -> list[float]:
+    order = sorted(range(len(values)), key=lambda i: values[i])
+    ranks = [0.0] * len(values)
+    i = 0
+    while i < len(order):
+        j = i
+        while j + 1 < len(order) and values[order[j + 1]] == values[order[i]]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[order[k]] = (i + j) / 2 + 1
+        i = j + 1
+    return ranks
+
+
+def _spearman(xs: list[float], ys: list[float]) -> Optional[float]:
+    if len(xs) < 3:
+        return None
+    rx, ry = _ranks(xs), _ranks(ys)
+    mx, my = sum(rx) / len(rx), sum(ry) / len(ry)
+    cov = sum((a - mx) * (b - my) for a, b in zip(rx, ry))
+    var = (sum((a - mx) ** 2 for a in rx) * sum((b - my) ** 2 for b in ry)) ** 0.5
+    return round(cov / var, 2) if var else None
+
+
+def task_stats(tasks: list[dict], content: str) -> dict:
+    """Per-task elapsed time, per-size percentiles, throughput and estimate fit."""
+    by_number = {t['number']: t for t in tasks}
+    started, finished = {}, {}
+    for e in parse_log_events(content):
+        if e['event'] == 'START':
+            started.setdefault(e['task'], e['time'])
+        else:
+            finished[e['task']] = e['time']
+
+    per_task = []
+    for number, done in sorted(finished.items()):
+        task = by_number.get(number)
+        if not task or number not in started or done < started[number]:
+            continue
+        per_task.append({
+            'number': number,
+            'size': task['size'],
+            'description': task['description'],
+            'seconds': (done - started[number]).total_seconds(),
+        })
+
+    by_size = {}
+    for size in ('S', 'M', 'L'):
+        durations = [t['seconds'] for t in per_task if t['size'] == size]
+        if durations:
+            median = statistics.median(durations)
+            by_size[size] = {
+                'count': len(durations),
+                'median_seconds': median,
+                'p90_seconds': _percentile(durations, 90),
+                'median_seconds_per_weight': round(median / SIZE_WEIGHTS[size], 1),
+            }
+
+    throughput = None
+    if finished and started:
+        span = (max(finished.values()) - min(started.values())).total_seconds()
+        if span > 0:
+            throughput = round(len(finished) / (span / 3600), 2)
+
+    misestimated = []
+    for t in per_task:
+        closest = min(by_size, key=lambda size: abs(by_size[size]['median_seconds'] - t['seconds']))
+        if closest != t['size']:
+            misestimated.append({'number': t['number'], 'size': t['size'], 'behaved_like': closest})
+
+    return {
+        'timed_tasks': len(per_task),
+        'completed_tasks': len(finished),
+        'tasks_per_hour': throughput,
+        'by_size': by_size,
+        'size_duration_correlation': _spearman(
+            [SIZE_WEIGHTS[t['size']] for t in per_task], [t['seconds'] for t in per_task]),
+        'misestimated': misestimated,
+        'tasks': per_task,
+    }
+
+
+def _format_seconds(seconds: float) -> str:
+    m, s = divmod(int(seconds), 60)
+    h, m = divmod(m, 60)
+    if h:
+        return f"{h}h {m}m"
+    if m:
+        return f"{m}m {s}s"
+    return f"{s}s"
+
+
+def print_stats(stats: dict) -> None:
+    if not stats['timed_tasks']:
+        print("No timed tasks yet (need START and DONE log entries)")
+        return
+    print(f"Timed tasks: {stats['timed_tasks']} of {stats['completed_tasks']} completed")
+    if stats['tasks_per_hour'] is not None:
+        print(f"Throughput: {stats['tasks_per_hour']} tasks/hour")
+    print()
+    print(f"{'Size':<6} {'Count':>5} {'Median':>10} {'p90':>10} {'Per weight':>11}")
+    for size, row in stats['by_size'].items():
+        print(f"{size:<6} {row['count']:>5} {_format_seconds(row['median_seconds']):>10} "
+              f"{_format_seconds(row['p90_seconds']):>10} {_format_seconds(row['median_seconds_per_weight']):>11}")
+    print()
+    corr = stats['size_duration_correlation']
+    print(f"Size/duration rank correlation: {corr if corr is not None else 'n/a (need 3+ tasks)'}")
+    for m in stats['misestimated']:
+        print(f"  Task {m['number']} sized [{m['size']}] took like [{m['behaved_like']}]")
+    print()
+    for t in sorted(stats['tasks'], key=lambda t: t['seconds'], reverse=True):
+        print(f"  {t['number']}. [{t['size']}] {_format_seconds(t['seconds']):>8}  {t['description']}")
+
+
+def log_entry(events: list[str]) -> list[str]:
+    """Format log lines: one event inline, several as a BATCH entry with sub-items."""
+    time_str = datetime.now().strftime(LOG_TIME_FORMAT)
+    if len(events) == 1:
+        return [f"- {time_str} — {events[0]}"]
+    counts = {}
+    for event in events:
+        kind = event.split(':', 1)[0]
+        counts[kind] = counts.get(kind, 0) + 1
+    summary = ', '.join(f"{n} {kind}" for kind, n in counts.items())
+    return [f"- {time_str} — BATCH: {len(events)} operations ({summary})"] + [f"  - {e}" for e in events]
+
+
+def update_task_status(data: bytes, tasks: list[dict], task_num: int, new_status: str) -> bytes:
+    """Update a task's status in TASKS.md content."""
+    data, event = set_task_status(data, tasks, task_num, new_status)
+    return append_log(data, tasks, log_entry([event]))
+
+
+def add_task(data: bytes, tasks: list[dict], description: str, size: str = "M") -> bytes:
+    """Add a new task to TASKS.md."""
+    data, event = insert_task(data, tasks, description, size)
+    return append_log(data, tasks, log_entry([event]))
+
+
+def read_operations(source: str) -> list[dict]:
+    """Read JSONL operations ({"op": "complete"|"progress"|"add", ...}) from a file or '-'."""
+    try:
+        if source == '-':
+            lines = sys.stdin.read().splitlines()
+        else:
+            lines = Path(source).read_text(encoding='utf-8').splitlines()
+    except FileNotFoundError:
+        print(f"Error: File not found: {source}", file=sys.stderr)
+        sys.exit(1)
+
+    ops = []
+    for lineno, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            op = json.loads(line)
+        except json.JSONDecodeError as e:
+            print(f"Error: Invalid JSON on line {lineno}: {e}", file=sys.stderr)
+            sys.exit(1)
+        if not isinstance(op, dict) or op.get('op') not in BATCH_OPS:
+            print(f"Error: Line {lineno}: 'op' must be one of {sorted(BATCH_OPS)}", file=sys.stderr)
+            sys.exit(1)
+        if op['op'] == 'add':
+            if not op.get('description') or op.get('size', 'M') not in ('S', 'M', 'L'):
+                print(f"Error: Line {lineno}: 'add' needs a description and size S|M|L", file=sys.stderr)
+                sys.exit(1)
+            after = op.get('after', [])
+            if not isinstance(after, list) or not all(isinstance(n, int) for n in after):
+                print(f"Error: Line {lineno}: 'after' must be a list of task numbers", file=sys.stderr)
+                sys.exit(1)
+        elif not isinstance(op.get('task'), int):
+            print(f"Error: Line {lineno}: '{op['op']}' needs an integer 'task'", file=sys.stderr)
+            sys.exit(1)
+        ops.append(op)
+    return ops
+
+
+def apply_operations(data: bytes, tasks: list[dict], ops: list[dict]) -> tuple[bytes, list[str]]:
+    """Apply operations in order in memory; returns (data with log entry, messages)."""
+    events = []
+    messages = []
+    for op in ops:
+        if op['op'] == 'add':
+            description = with_dependencies(op['description'], op.get('after'))
+            data, event = insert_task(data, tasks, description, op.get('size', 'M'))
+            messages.append(f"Added task: {description}")
+        else:
+            status = BATCH_OPS[op['op']]
+            data, event = set_task_status(data, tasks, op['task'], status)
+            messages.append(f"Task {op['task']} marked as {status}")
+        events.append(event)
+    if events:
+        data = append_log(data, tasks, log_entry(events))
+    return data, messages
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    """Write via a temp file in the same directory and rename over path."""
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{path.name}.", suffix='.tmp', dir=path.parent)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        if path.exists():
+            os.chmod(tmp_path, path.stat().st_mode & 0o777)
+        else:
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(tmp_path, 0o666 & ~umask)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def get_lock_path(path: Path) -> Path:
+    return path.with_name(f".{path.name}.lock")
+
+
+@contextmanager
+def task_lock(path: Path, timeout: float = LOCK_TIMEOUT):
+    """Hold an exclusive flock on the sidecar lock file.
+
+    The lock lives on a separate file because atomic renames replace the
+    TASKS.md inode. Contention is retried with jittered exponential backoff.
+    """
+    if fcntl is None:
+        yield
+        return
+    with open(get_lock_path(path), 'a') as lock_file:
+        deadline = time.monotonic() + timeout
+        delay = LOCK_BACKOFF_INITIAL
+        while True:
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    print(f"Error: Timed out after {timeout}s waiting for lock on {path}", file=sys.stderr)
+                    sys.exit(1)
+                time.sleep(delay * random.uniform(0.5, 1.5))
+                delay = min(delay * 2, LOCK_BACKOFF_MAX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
 
-    updated = '\n'.join(lines)
+def write_tasks(path: Path, data: bytes, tasks: list[dict]) -> None:
+    write_atomic(path, data)
+    save_index(path, data, tasks)
 
-    time_str = datetime.now().strftime("%H:%M")
-    log_entry = f"- {time_str} — NOTE: Added task — {description}"
-    updated = updated.rstrip() + f"\n{log_entry}\n"
 
-    return updated
+def task_list(value: str) -> list[int]:
+    try:
+        return [int(n) for n in value.split(',') if n.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected task numbers like 3 or 3,5,7, got '{value}'")
 
 
 def main() -> None:
@@ -217,64 +818,96 @@ def main() -> None:
     parser.add_argument('--input', '-i', help='Text description to generate TASKS.md from')
     parser.add_argument('--file', '-f', help='Document file to parse for task generation')
     parser.add_argument('--output', '-o', default='TASKS.md', help='Output file path')
+    parser.add_argument('--max-tasks', type=int, default=MAX_DOCUMENT_TASKS,
+                        help=f'Cap on tasks extracted with --file (default: {MAX_DOCUMENT_TASKS})')
     parser.add_argument('--existing', '-e', help='Path to existing TASKS.md')
     parser.add_argument('--status', '-s', action='store_true', help='Print progress status')
-    parser.add_argument('--complete', '-c', type=int, help='Mark task N as completed')
-    parser.add_argument('--progress', '-p', type=int, help='Mark task N as in_progress')
-    parser.add_argument('--add', '-a', help='Add a new task')
+    parser.add_argument('--complete', '-c', type=task_list, help='Mark task(s) N[,N...] as completed')
+    parser.add_argument('--progress', '-p', type=task_list, help='Mark task(s) N[,N...] as in_progress')
+    parser.add_argument('--add', '-a', action='append', help='Add a new task (repeatable)')
     parser.add_argument('--size', default='M', choices=['S', 'M', 'L'], help='Size for --add')
+    parser.add_argument('--after', type=task_list, help='Dependencies N[,N...] for tasks added with --add')
+    parser.add_argument('--batch', '-b', metavar='FILE', help="JSONL operations file, or '-' for stdin")
+    parser.add_argument('--plan', action='store_true', help='Print dependency waves and critical path')
+    parser.add_argument('--stats', action='store_true', help='Print task timing analytics from the log')
+    parser.add_argument('--json', action='store_true', help='Print --plan/--stats output as JSON')
+    parser.add_argument('--lock-timeout', type=float, default=LOCK_TIMEOUT,
+                        help=f'Seconds to wait for the TASKS.md lock (default: {LOCK_TIMEOUT:.0f})')
     args = parser.parse_args()
 
     # Generate mode
     if args.input:
         content = generate_skeleton(args.input, source="user input")
-        Path(args.output).write_text(content, encoding='utf-8')
+        output = Path(args.output)
+        with task_lock(output, args.lock_timeout):
+            write_atomic(output, content.encode('utf-8'))
         print(f"Generated: {args.output}")
         return
 
     if args.file:
         try:
-            doc_text = Path(args.file).read_text(encoding='utf-8')
+            content = extract_document_tasks(args.file, args.max_tasks)
         except FileNotFoundError:
             print(f"Error: File not found: {args.file}", file=sys.stderr)
             sys.exit(1)
-        content = generate_skeleton(doc_text, source=args.file)
-        Path(args.output).write_text(content, encoding='utf-8')
+        output = Path(args.output)
+        with task_lock(output, args.lock_timeout):
+            write_atomic(output, content.encode('utf-8'))
         print(f"Generated: {args.output}")
         return
 
     # Existing mode
     if args.existing:
-        try:
-            content = Path(args.existing).read_text(encoding='utf-8')
-        except FileNotFoundError:
+        path = Path(args.existing)
+        if not path.exists():
             print(f"Error: File not found: {args.existing}", file=sys.stderr)
             sys.exit(1)
 
-        if args.status:
-            print_status(content)
+        ops = [{'op': 'progress', 'task': n} for n in args.progress or []]
+        ops += [{'op': 'complete', 'task': n} for n in args.complete or []]
+        ops += [{'op': 'add', 'description': d, 'size': args.size, 'after': args.after} for d in args.add or []]
+        if args.batch:
+            ops += read_operations(args.batch)
+
+        if ops and not (args.status or args.plan or args.stats):
+            with task_lock(path, args.lock_timeout):
+                data = path.read_bytes()
+                tasks = load_index(path, data)
+                updated, messages = apply_operations(data, tasks, ops)
+                write_tasks(path, updated, tasks)
+            for message in messages:
+                print(message)
             return
 
-        if args.complete:
-            updated = update_task_status(content, args.complete, 'completed')
-            Path(args.existing).write_text(updated, encoding='utf-8')
-            print(f"Task {args.complete} marked as completed")
+        # Read-only modes: atomic renames mean no lock is needed
+        data = path.read_bytes()
+        tasks = load_index(path, data)
+
+        if args.status:
+            print_status(tasks)
             return
 
-        if args.progress:
-            updated = update_task_status(content, args.progress, 'in_progress')
-            Path(args.existing).write_text(updated, encoding='utf-8')
-            print(f"Task {args.progress} marked as in_progress")
+        if args.stats:
+            stats = task_stats(tasks, data.decode('utf-8'))
+            if args.json:
+                print(json.dumps(stats, indent=2, ensure_ascii=False))
+            else:
+                print_stats(stats)
             return
 
-        if args.add:
-            updated = add_task(content, args.add, args.size)
-            Path(args.existing).write_text(updated, encoding='utf-8')
-            print(f"Added task: {args.add}")
+        if args.plan:
+            plan = plan_tasks(tasks)
+            if args.json:
+                print(json.dumps(plan, indent=2, ensure_ascii=False))
+            elif 'error' not in plan:
+                print_plan(tasks, plan)
+            if 'error' in plan:
+                print(f"Error: {plan['error']}", file=sys.stderr)
+                sys.exit(1)
             return
 
         # Default: print status
-        print_status(content)
+        print_status(tasks)
         return
 
     parser.print_help()
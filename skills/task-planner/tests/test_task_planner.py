@@ -0,0 +1,61 @@
+"""Stress test for concurrent task-planner updates against one TASKS.md."""
+
+import importlib.util
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+TASK_PLANNER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            "scripts", "task-planner.py")
+WORKERS = 12
+
+
+def load_task_planner():
+    spec = importlib.util.spec_from_file_location("task_planner", TASK_PLANNER)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class ConcurrentUpdateTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "TASKS.md")
+        self.task_planner = load_task_planner()
+        text = "\n".join(["Stress"] + [f"Seed task {n}" for n in range(1, WORKERS)])
+        subprocess.run([sys.executable, TASK_PLANNER, "--input", text, "--output", self.path],
+                       check=True, capture_output=True)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_parallel_updates_are_not_lost(self):
+        workers = [
+            subprocess.Popen([sys.executable, TASK_PLANNER, "--existing", self.path,
+                              "--complete", str(n), "--add", f"Worker {n} follow-up"],
+                             stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+            for n in range(1, WORKERS + 1)
+        ]
+        for worker in workers:
+            _, stderr = worker.communicate(timeout=60)
+            self.assertEqual(worker.returncode, 0, stderr.decode())
+
+        data = Path(self.path).read_bytes()
+        tasks = self.task_planner.parse_tasks(data)
+        self.assertEqual(len(tasks), 2 * WORKERS)
+        self.assertEqual([t["status"] for t in tasks[:WORKERS]], ["completed"] * WORKERS)
+        self.assertEqual(sorted(t["description"] for t in tasks[WORKERS:]),
+                         sorted(f"Worker {n} follow-up" for n in range(1, WORKERS + 1)))
+        # The document is still whole: one log entry per worker after the untouched sections.
+        content = data.decode("utf-8")
+        self.assertIn("## Test Coverage", content)
+        self.assertEqual(len(re.findall(r"^- \S+ \S+ — BATCH: 2 operations", content, re.M)), WORKERS)
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), [".TASKS.md.idx", ".TASKS.md.lock", "TASKS.md"])
+
+
+if __name__ == "__main__":
+    unittest.main()
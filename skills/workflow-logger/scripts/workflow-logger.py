@@ -1,42 +1,259 @@
 #!/usr/bin/env python3
 """Structured markdown logger for multi-agent design workflows.
 
-Appends formatted events to workflow_log.md with timestamps.
+Appends formatted events to workflow_log.md with timestamps, and the same
+events as structured records to workflow_log.jsonl. The markdown can be
+regenerated from the JSONL with 'render', and 'query' filters records by
+type or time range without parsing markdown.
+The batch subcommand renders a JSONL stream of phase/event/verdict/complete
+records and appends them with a single write and fsync. 'report' computes
+phase, iteration and agent durations and the critical path from the JSONL.
+'invocation' records per-call tokens and latency; 'usage' aggregates them and
+configured token/time budgets raise warnings as they are approached.
+
+Large logs rotate into numbered segments (workflow_log.000.md, ...) tracked
+by a small workflow_log.index.json holding the start time, current phase and
+segment boundaries; 'compact' condenses completed phases into summaries.
 """
 
 import argparse
+import hashlib
 import json
 import os
+import random
 import re
 import sys
+import tempfile
+import time
+from contextlib import contextmanager
 from datetime import datetime
 
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to unlocked writes
+    fcntl = None
+
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+SEGMENT_MAX_BYTES = 1024 * 1024
+
+BUDGET_WARN_RATIO = 0.8
+
+LOCK_TIMEOUT = 30.0
+LOCK_BACKOFF_INITIAL = 0.01
+LOCK_BACKOFF_MAX = 0.5
+
 
 def get_log_path(folder: str) -> str:
     return os.path.join(folder, "workflow_log.md")
 
 
+def get_events_path(folder: str) -> str:
+    return os.path.join(folder, "workflow_log.jsonl")
+
+
+def get_index_path(folder: str) -> str:
+    return os.path.join(folder, "workflow_log.index.json")
+
+
+def get_segment_path(folder: str, number: int) -> str:
+    return os.path.join(folder, f"workflow_log.{number:03d}.md")
+
+
+def get_lock_path(folder: str) -> str:
+    return os.path.join(folder, ".workflow_log.lock")
+
+
+@contextmanager
+def log_lock(folder: str, timeout: float = LOCK_TIMEOUT):
+    """Hold an exclusive flock on the sidecar lock file.
+
+    Serializes appends, segment rotation and index updates between
+    concurrent writers. Contention is retried with jittered exponential backoff.
+    """
+    if fcntl is None or not os.path.isdir(folder):  # callers report the missing log
+        yield
+        return
+    with open(get_lock_path(folder), "a") as lock_file:
+        deadline = time.monotonic() + timeout
+        delay = LOCK_BACKOFF_INITIAL
+        while True:
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    print(f"Error: Timed out after {timeout}s waiting for lock on {folder}", file=sys.stderr)
+                    sys.exit(1)
+                time.sleep(delay * random.uniform(0.5, 1.5))
+                delay = min(delay * 2, LOCK_BACKOFF_MAX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
 def timestamp() -> str:
-    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    return datetime.now().strftime(TIME_FORMAT)
+
+
+def write_atomic(path: str, content: str) -> None:
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp",
+                                    dir=os.path.dirname(path) or ".")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(path):
+            os.chmod(tmp_path, os.stat(path).st_mode & 0o777)
+        else:
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(tmp_path, 0o666 & ~umask)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
 
+def load_index(folder: str) -> dict | None:
+    try:
+        with open(get_index_path(folder), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
 
-def append_log(folder: str, content: str) -> None:
+
+def save_index(folder: str, index: dict) -> None:
+    write_atomic(get_index_path(folder), json.dumps(index, indent=2, ensure_ascii=False))
+
+
+def render_continuation(index: dict) -> str:
+    number = len(index["segments"])
+    previous = os.path.basename(index["segments"][-1]["file"]) if index["segments"] else "none"
+    return f"""# Workflow Execution Log (continued)
+Project: {index['project']}
+Started: {index['started']}
+Segment: {number} (previous: {previous})
+
+## Execution Timeline
+
+"""
+
+
+def rotate_segment(folder: str, index: dict, first: dict) -> None:
+    """Move the active workflow_log.md into the next numbered segment.
+
+    first is the record that opens the new segment; unless it starts a new
+    phase, the current phase carries over into the segment.
+    """
+    ts = first["timestamp"]
     path = get_log_path(folder)
-    if not os.path.exists(path):
-        print(f"Error: Log file not found at {path}. Run 'init' first.", file=sys.stderr)
-        sys.exit(1)
-    with open(path, "a") as f:
-        f.write(content)
+    segment = get_segment_path(folder, len(index["segments"]))
+    index["segments"].append({
+        "file": os.path.basename(segment),
+        "start": index["segment_start"],
+        "end": ts,
+        "phases": index["segment_phases"],
+        "bytes": os.path.getsize(path),
+    })
+    index["segment_start"] = ts
+    carried = first["type"] != "phase" and index["current_phase"]
+    index["segment_phases"] = [index["current_phase"]] if carried else []
+    os.replace(path, segment)
+    write_atomic(path, render_continuation(index))
+
+
+def track_budget(index: dict, records: list[dict]) -> tuple[bool, list[dict]]:
+    """Add invocation tokens to the index totals and check the configured budgets.
+
+    Returns whether the index changed, plus warning event records for each
+    budget that newly crossed BUDGET_WARN_RATIO or 100%. Levels already
+    reached are kept in budget_warnings, so each one is reported on stderr
+    only once.
+    """
+    invocations = [r for r in records if r["type"] == "invocation"]
+    usage = index.setdefault("usage", {"invocations": 0, "input_tokens": 0, "output_tokens": 0})
+    for r in invocations:
+        usage["invocations"] += 1
+        usage["input_tokens"] += r["input_tokens"]
+        usage["output_tokens"] += r["output_tokens"]
+
+    ts = records[-1]["timestamp"]
+    elapsed = (datetime.strptime(ts, TIME_FORMAT) - datetime.strptime(index["started"], TIME_FORMAT)).total_seconds()
+    checks = (
+        ("token", usage["input_tokens"] + usage["output_tokens"], index.get("token_budget"), "{:,} tokens"),
+        ("time", elapsed / 60, index.get("time_budget_minutes"), "{:.0f} min"),
+    )
+    emitted = index.setdefault("budget_warnings", [])
+    warnings = []
+    for kind, used, budget, unit in checks:
+        if not budget:
+            continue
+        ratio = used / budget
+        if ratio < BUDGET_WARN_RATIO:
+            continue
+        level = "exceeded" if ratio > 1 else "warning"
+        message = (f"Budget {level}: {kind} budget {ratio:.0%} used "
+                   f"({unit.format(used)} of {unit.format(budget)})")
+        if f"{kind}:{level}" not in emitted:
+            print(message, file=sys.stderr)
+            emitted.append(f"{kind}:{level}")
+            warnings.append({"type": "event", "timestamp": ts, "message": message, "budget": kind})
+    return bool(invocations or warnings), warnings
+
+
+def append_log(folder: str, content: str, records: list[dict], sync: bool = False) -> None:
+    """Append rendered markdown to workflow_log.md and records to workflow_log.jsonl.
+
+    With an index present, the active segment is rotated first when it would
+    exceed max_segment_bytes, or at a phase start once it is a quarter full.
+    """
+    with log_lock(folder):
+        path = get_log_path(folder)
+        index = load_index(folder)
+        if index and not os.path.exists(path):
+            write_atomic(path, render_continuation(index))  # crashed mid-rotation
+        if not os.path.exists(path):
+            print(f"Error: Log file not found at {path}. Run 'init' first.", file=sys.stderr)
+            sys.exit(1)
+
+        phases = [r["phase"] for r in records if r["type"] == "phase"]
+        if index:
+            size = os.path.getsize(path)
+            limit = index.get("max_segment_bytes", SEGMENT_MAX_BYTES)
+            rotate = size > 0 and (size + len(content.encode("utf-8")) > limit or (phases and size >= limit // 4))
+            if rotate:
+                rotate_segment(folder, index, records[0])
+            if phases:
+                index["current_phase"] = phases[-1]
+                index["segment_phases"].extend(phases)
+            tracked, warnings = track_budget(index, records)
+            if warnings:
+                records = records + warnings
+                content += "".join(render_event(w["message"], w["timestamp"]) for w in warnings)
+            if rotate or phases or tracked:
+                save_index(folder, index)
+
+        lines = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records)
+        for target, data in ((path, content), (get_events_path(folder), lines)):
+            with open(target, "a") as f:
+                f.write(data)
+                if sync:
+                    f.flush()
+                    os.fsync(f.fileno())
     print(f"Log updated: {path}")
 
 
-def cmd_init(args):
-    folder = args.folder
-    os.makedirs(folder, exist_ok=True)
-    path = get_log_path(folder)
-    content = f"""# Workflow Execution Log
-Project: {args.project}
-Started: {timestamp()}
+def render_init(project: str, ts: str | None = None) -> str:
+    return f"""# Workflow Execution Log
+Project: {project}
+Started: {ts or timestamp()}
 Status: In Progress
 
 ## Summary
@@ -47,36 +264,64 @@ Status: In Progress
 ## Execution Timeline
 
 """
-    with open(path, "w") as f:
-        f.write(content)
+
+
+def cmd_init(args):
+    folder = args.folder
+    os.makedirs(folder, exist_ok=True)
+    path = get_log_path(folder)
+    record = {"type": "init", "timestamp": timestamp(), "project": args.project}
+    with log_lock(folder):
+        with open(path, "w") as f:
+            f.write(render_init(args.project, record["timestamp"]))
+        with open(get_events_path(folder), "w") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        for stale in (index := load_index(folder)) and index["segments"] or []:
+            try:
+                os.remove(os.path.join(folder, stale["file"]))
+            except OSError:
+                pass
+        save_index(folder, {
+            "project": args.project,
+            "started": record["timestamp"],
+            "current_phase": None,
+            "max_segment_bytes": args.segment_bytes,
+            "segment_start": record["timestamp"],
+            "segment_phases": [],
+            "segments": [],
+            "token_budget": args.token_budget,
+            "time_budget_minutes": args.time_budget,
+        })
     print(f"Log initialized: {path}")
 
 
-def cmd_phase(args):
-    content = f"""### [{timestamp()}] {args.phase}
-- Activated: {args.agents}
+def render_phase(phase: str, agents: str, ts: str | None = None) -> str:
+    return f"""### [{ts or timestamp()}] {phase}
+- Activated: {agents}
 - Status: In progress
 
 """
-    append_log(args.folder, content)
 
 
-def cmd_event(args):
-    content = f"""- [{timestamp()}] {args.message}
+def render_event(message: str, ts: str | None = None, agent: str | None = None) -> str:
+    if agent:
+        message = f"{agent}: {message}"
+    return f"""- [{ts or timestamp()}] {message}
 
 """
-    append_log(args.folder, content)
 
 
-def cmd_verdict(args):
-    content = f"""### [{timestamp()}] Review - Iteration {args.iteration}/5
-- Verdict: {args.verdict}
-- Critical: {args.critical}, Major: {args.major}, Minor: {args.minor}
+def render_verdict(iteration: int, verdict: str, critical: int, major: int, minor: int,
+                   summary: str = "", issues="", ts: str | None = None) -> str:
+    content = f"""### [{ts or timestamp()}] Review - Iteration {iteration}/5
+- Verdict: {verdict}
+- Critical: {critical}, Major: {major}, Minor: {minor}
 """
     # Parse and render issues table if provided
-    if args.issues:
+    if issues:
         try:
-            issues = json.loads(args.issues)
+            if isinstance(issues, str):
+                issues = json.loads(issues)
             if issues:
                 content += "\nIssues:\n\n"
                 content += "| # | Severity | Section | Issue | Required Action |\n"
@@ -88,17 +333,89 @@ def cmd_verdict(args):
                     action = issue.get("action", "")
                     content += f"| {i} | {sev} | {sec} | {desc} | {action} |\n"
                 content += "\n"
-        except (json.JSONDecodeError, TypeError):
-            content += f"- Key feedback: {args.issues}\n\n"
-    elif args.summary:
-        content += f"- Key feedback: {args.summary}\n\n"
+        except (json.JSONDecodeError, TypeError, AttributeError):
+            content += f"- Key feedback: {issues}\n\n"
+    elif summary:
+        content += f"- Key feedback: {summary}\n\n"
     else:
         content += "\n"
-    append_log(args.folder, content)
+    return content
+
+
+def parse_issues(issues: str):
+    """Return issues as a list when they are a JSON array, else the raw string."""
+    if not issues:
+        return []
+    try:
+        parsed = json.loads(issues)
+    except json.JSONDecodeError:
+        return issues
+    return parsed if isinstance(parsed, list) else issues
+
+
+def render_invocation(agent: str, model: str, input_tokens: int, output_tokens: int,
+                      latency_seconds: float, ts: str | None = None) -> str:
+    return f"""- [{ts or timestamp()}] Invocation: {agent} ({model}) - {input_tokens:,} in / {output_tokens:,} out tokens, {latency_seconds:.1f}s
+
+"""
+
+
+def cmd_phase(args):
+    write_records(args.folder, [{"type": "phase", "phase": args.phase, "agents": args.agents}])
+
+
+def cmd_event(args):
+    record = {"type": "event", "message": args.message}
+    if args.agent:
+        record["agent"] = args.agent
+    write_records(args.folder, [record])
+
+
+def cmd_invocation(args):
+    record = {
+        "type": "invocation",
+        "agent": args.agent,
+        "model": args.model,
+        "input_tokens": args.input_tokens,
+        "output_tokens": args.output_tokens,
+        "latency_seconds": args.latency,
+    }
+    if args.iteration is not None:
+        record["iteration"] = args.iteration
+    write_records(args.folder, [record])
+
+
+def cmd_budget(args):
+    with log_lock(args.folder):
+        index = load_index(args.folder)
+        if index is None:
+            print(f"Error: Index not found at {get_index_path(args.folder)}. Run 'init' first.", file=sys.stderr)
+            sys.exit(1)
+        if args.tokens is not None:
+            index["token_budget"] = args.tokens or None
+        if args.minutes is not None:
+            index["time_budget_minutes"] = args.minutes or None
+        index["budget_warnings"] = []
+        save_index(args.folder, index)
+    print(f"Budget: tokens={index.get('token_budget') or 'unlimited'}, "
+          f"minutes={index.get('time_budget_minutes') or 'unlimited'}")
+
+
+def cmd_verdict(args):
+    write_records(args.folder, [{
+        "type": "verdict",
+        "iteration": args.iteration,
+        "verdict": args.verdict,
+        "critical": args.critical,
+        "major": args.major,
+        "minor": args.minor,
+        "summary": args.summary,
+        "issues": parse_issues(args.issues),
+    }])
 
 
 def get_started_time(folder: str) -> datetime | None:
-    """Extract start time from workflow_state.json or log file."""
+    """Extract start time from workflow_state.json, the event log or the markdown log."""
     state_path = os.path.join(folder, "workflow_state.json")
     if os.path.exists(state_path):
         with open(state_path, "r") as f:
@@ -109,6 +426,21 @@ def get_started_time(folder: str) -> datetime | None:
                     return datetime.fromisoformat(started)
                 except ValueError:
                     pass
+    index = load_index(folder)
+    if index and index.get("started"):
+        try:
+            return datetime.strptime(index["started"], TIME_FORMAT)
+        except ValueError:
+            pass
+    events_path = get_events_path(folder)
+    if os.path.exists(events_path):
+        with open(events_path, "r") as f:
+            try:
+                first = json.loads(f.readline())
+                if first.get("type") == "init":
+                    return datetime.strptime(first["timestamp"], TIME_FORMAT)
+            except (ValueError, KeyError, AttributeError):
+                pass
     log_path = get_log_path(folder)
     if os.path.exists(log_path):
         with open(log_path, "r") as f:
@@ -116,7 +448,7 @@ def get_started_time(folder: str) -> datetime | None:
                 m = re.search(r"Started:\s*(\d{4}-\d{2}-\d{2}\s+\d{2}:\d{2}:\d{2})", line)
                 if m:
                     try:
-                        return datetime.strptime(m.group(1), "%Y-%m-%d %H:%M:%S")
+                        return datetime.strptime(m.group(1), TIME_FORMAT)
                     except ValueError:
                         pass
     return None
@@ -134,27 +466,597 @@ def format_duration(seconds: float) -> str:
         return f"{s}s"
 
 
-def cmd_complete(args):
-    started = get_started_time(args.folder)
-    now = datetime.now()
-    if started:
-        elapsed = (now - started).total_seconds()
-        duration_line = f"- Processing time: {format_duration(elapsed)}"
+def render_complete(iterations: int, processing_seconds: float | None, ts: str | None = None) -> str:
+    if processing_seconds is not None:
+        duration_line = f"- Processing time: {format_duration(processing_seconds)}"
     else:
         duration_line = "- Processing time: unknown (start time not found)"
-    content = f"""## Final Summary
+    return f"""## Final Summary
 - Status: COMPLETED
-- Total iterations: {args.iterations}
-- Completion time: {timestamp()}
+- Total iterations: {iterations}
+- Completion time: {ts or timestamp()}
 {duration_line}
 - Documents approved: YES
 - Next steps: Invoke DevOps agent with 'deploy' command
 
 """
-    append_log(args.folder, content)
+
+
+def processing_seconds(folder: str, ts: str) -> float | None:
+    started = get_started_time(folder)
+    if not started:
+        return None
+    return (datetime.strptime(ts, TIME_FORMAT) - started).total_seconds()
+
+
+def cmd_complete(args):
+    write_records(args.folder, [{"type": "complete", "iterations": args.iterations}])
     print("Workflow marked as COMPLETED")
 
 
+BATCH_FIELDS = {
+    "phase": ("phase", "agents"),
+    "event": ("message",),
+    "verdict": ("iteration", "verdict", "critical", "major", "minor"),
+    "complete": ("iterations",),
+    "invocation": ("agent", "model", "input_tokens", "output_tokens", "latency_seconds"),
+}
+
+# Numeric fields normalize_record converts, checked up front so one bad line rejects the batch.
+BATCH_NUMBERS = {
+    "verdict": {"iteration": int, "critical": int, "major": int, "minor": int},
+    "complete": {"iterations": int},
+    "invocation": {"input_tokens": int, "output_tokens": int, "latency_seconds": float, "iteration": int},
+}
+
+
+def render_record(record: dict) -> str:
+    """Render one record exactly as the matching subcommand writes it."""
+    ts = record.get("timestamp")
+    kind = record["type"]
+    if kind == "init":
+        return render_init(record.get("project", ""), ts)
+    if kind == "phase":
+        return render_phase(record["phase"], record["agents"], ts)
+    if kind == "event":
+        return render_event(record["message"], ts, record.get("agent"))
+    if kind == "verdict":
+        return render_verdict(int(record["iteration"]), record["verdict"], int(record["critical"]),
+                              int(record["major"]), int(record["minor"]),
+                              record.get("summary", ""), record.get("issues", ""), ts)
+    if kind == "invocation":
+        return render_invocation(record["agent"], record["model"], int(record["input_tokens"]),
+                                 int(record["output_tokens"]), float(record["latency_seconds"]), ts)
+    if kind == "complete":
+        return render_complete(int(record["iterations"]), record.get("processing_seconds"), ts)
+    return ""
+
+
+def normalize_record(folder: str, record: dict) -> dict:
+    """Fill in timestamp and derived fields before a record is stored."""
+    record = {"type": record["type"], "timestamp": record.get("timestamp") or timestamp(),
+              **{k: v for k, v in record.items() if k not in ("type", "timestamp")}}
+    if record["type"] == "verdict":
+        for key in ("iteration", "critical", "major", "minor"):
+            record[key] = int(record[key])
+        if isinstance(record.get("issues"), str):
+            record["issues"] = parse_issues(record["issues"])
+    elif record["type"] == "invocation":
+        for key in ("input_tokens", "output_tokens"):
+            record[key] = int(record[key])
+        record["latency_seconds"] = float(record["latency_seconds"])
+        if record.get("iteration") is not None:
+            record["iteration"] = int(record["iteration"])
+    elif record["type"] == "complete":
+        record["iterations"] = int(record["iterations"])
+        record["processing_seconds"] = processing_seconds(folder, record["timestamp"])
+    return record
+
+
+def write_records(folder: str, records: list[dict], sync: bool = False) -> None:
+    records = [normalize_record(folder, r) for r in records]
+    append_log(folder, "".join(render_record(r) for r in records), records, sync)
+
+
+def read_records(source: str) -> list[dict]:
+    """Read and validate JSONL records from a file or '-' (stdin)."""
+    try:
+        if source == "-":
+            lines = sys.stdin.read().splitlines()
+        else:
+            with open(source, "r") as f:
+                lines = f.read().splitlines()
+    except FileNotFoundError:
+        print(f"Error: Batch file not found: {source}", file=sys.stderr)
+        sys.exit(1)
+
+    records = []
+    for lineno, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            print(f"Error: Invalid JSON on line {lineno}: {e}", file=sys.stderr)
+            sys.exit(1)
+        if not isinstance(record, dict) or record.get("type") not in BATCH_FIELDS:
+            print(f"Error: Line {lineno}: 'type' must be one of {list(BATCH_FIELDS)}", file=sys.stderr)
+            sys.exit(1)
+        missing = [k for k in BATCH_FIELDS[record["type"]] if k not in record]
+        if missing:
+            print(f"Error: Line {lineno}: '{record['type']}' is missing {missing}", file=sys.stderr)
+            sys.exit(1)
+        for key, convert in BATCH_NUMBERS.get(record["type"], {}).items():
+            if record.get(key) is None:
+                continue
+            try:
+                convert(record[key])
+            except (TypeError, ValueError):
+                kind = "an integer" if convert is int else "a number"
+                print(f"Error: Line {lineno}: '{key}' must be {kind}, got {record[key]!r}", file=sys.stderr)
+                sys.exit(1)
+        ts = record.get("timestamp")
+        if ts is not None:
+            try:
+                datetime.strptime(ts, TIME_FORMAT)
+            except (TypeError, ValueError):
+                print(f"Error: Line {lineno}: timestamp must be 'YYYY-MM-DD HH:MM:SS'", file=sys.stderr)
+                sys.exit(1)
+        records.append(record)
+    return records
+
+
+def cmd_batch(args):
+    records = read_records(args.input)
+    if records:
+        write_records(args.folder, records, sync=True)
+    print(f"Batch: {len(records)} record(s) appended")
+
+
+def load_events(folder: str) -> list[dict]:
+    path = get_events_path(folder)
+    if not os.path.exists(path):
+        print(f"Error: Event log not found at {path}. Run 'init' first.", file=sys.stderr)
+        sys.exit(1)
+    events = []
+    with open(path, "r") as f:
+        for line in f:
+            if line.strip():
+                try:
+                    events.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue  # tolerate a torn final line after a crash
+    return events
+
+
+def normalize_time_bound(value: str | None, end: bool = False) -> str | None:
+    """Accept 'YYYY-MM-DD', 'YYYY-MM-DD HH:MM[:SS]' or ISO 'T' forms."""
+    if not value:
+        return None
+    value = value.replace("T", " ")
+    for fmt in (TIME_FORMAT, "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            parsed = datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+        if fmt == "%Y-%m-%d" and end:
+            return parsed.strftime("%Y-%m-%d 23:59:59")
+        return parsed.strftime(TIME_FORMAT)
+    print(f"Error: Invalid time '{value}', expected YYYY-MM-DD[ HH:MM[:SS]]", file=sys.stderr)
+    sys.exit(1)
+
+
+def cmd_render(args):
+    content = "".join(render_record(r) for r in load_events(args.folder))
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(content)
+        print(f"Rendered: {args.output}")
+    else:
+        sys.stdout.write(content)
+
+
+def summarize_phase(records: list[dict]) -> str:
+    """Condense one finished phase (phase record plus its followers) to a short block."""
+    head = records[0]
+    end = records[-1]["timestamp"]
+    if len(records) > 1:
+        seconds = (datetime.strptime(end, TIME_FORMAT)
+                   - datetime.strptime(head["timestamp"], TIME_FORMAT)).total_seconds()
+        span = f"{format_duration(seconds)} (until {end})"
+    else:
+        span = "0s"
+    events = [r for r in records if r["type"] == "event"]
+    verdicts = [r for r in records if r["type"] == "verdict"]
+    invocations = [r for r in records if r["type"] == "invocation"]
+    content = f"""### [{head['timestamp']}] {head['phase']} (compacted)
+- Activated: {head['agents']}
+- Duration: {span}
+- Events: {len(events)}
+"""
+    if invocations:
+        tokens = sum(r["input_tokens"] + r["output_tokens"] for r in invocations)
+        content += f"- Invocations: {len(invocations)} ({tokens:,} tokens)\n"
+    if verdicts:
+        last = verdicts[-1]
+        content += (f"- Reviews: {len(verdicts)} (last: iteration {last['iteration']} {last['verdict']}, "
+                    f"Critical: {last['critical']}, Major: {last['major']}, Minor: {last['minor']})\n")
+    return content + "\n"
+
+
+def cmd_compact(args):
+    folder = args.folder
+    with log_lock(folder):
+        events = load_events(folder)
+        header = [r for r in events if r["type"] == "init"][:1]
+        completion = [r for r in events if r["type"] == "complete"]
+        phases = []
+        preamble = []
+        for record in events:
+            if record["type"] in ("init", "complete"):
+                continue
+            if record["type"] == "phase":
+                phases.append([record])
+            elif phases:
+                phases[-1].append(record)
+            else:
+                preamble.append(record)
+
+        finished = phases if completion else phases[:-1]
+        active = [] if completion else phases[-1:]
+        content = "".join(render_record(r) for r in header + preamble)
+        content += "".join(summarize_phase(p) for p in finished)
+        content += "".join(render_record(r) for p in active for r in p)
+        content += "".join(render_record(r) for r in completion)
+
+        write_atomic(get_log_path(folder), content)
+        index = load_index(folder)
+        if index:
+            for segment in index["segments"]:
+                try:
+                    os.remove(os.path.join(folder, segment["file"]))
+                except OSError:
+                    pass
+            index["segments"] = []
+            index["segment_start"] = header[0]["timestamp"] if header else index["segment_start"]
+            index["segment_phases"] = [p[0]["phase"] for p in phases]
+            index["compacted"] = {"timestamp": timestamp(), "phases": len(finished)}
+            save_index(folder, index)
+    print(f"Compacted: {len(finished)} completed phase(s) summarized in {get_log_path(folder)}")
+
+
+def parse_time(ts: str) -> datetime:
+    return datetime.strptime(ts, TIME_FORMAT)
+
+
+def charged_agent(event: dict, phase_agents: str) -> str:
+    """Agent charged with the time leading up to this record."""
+    if event["type"] in ("phase", "complete"):
+        return phase_agents
+    if event["type"] == "verdict":
+        return event.get("agent") or "Critic"
+    return event.get("agent") or phase_agents
+
+
+def build_report(events: list[dict]) -> dict:
+    """Derive phase, iteration and agent durations from the event records.
+
+    The time between two consecutive records is charged to the later record's
+    agent: its 'agent' field, 'Critic' for verdicts, otherwise the agents of
+    the current phase. A phase runs until the next phase or completion; the
+    critical path takes the busiest agent of each (sequential) phase.
+    """
+    timed = [e for e in events if e.get("timestamp")]
+    started = next((e["timestamp"] for e in timed if e["type"] == "init"), timed[0]["timestamp"] if timed else None)
+    finished = next((e["timestamp"] for e in timed if e["type"] == "complete"), None)
+    end = finished or (timed[-1]["timestamp"] if timed else None)
+
+    phases = []
+    iterations = []
+    agents = {}
+    previous = None
+    for event in timed:
+        kind = event["type"]
+        if previous is not None and phases:
+            seconds = (parse_time(event["timestamp"]) - parse_time(previous)).total_seconds()
+            current = phases[-1]
+            owner = charged_agent(event, current["agents"])
+            agents[owner] = agents.get(owner, 0) + seconds
+            current["by_agent"][owner] = current["by_agent"].get(owner, 0) + seconds
+        if kind == "phase":
+            if phases:
+                phases[-1]["end"] = event["timestamp"]
+            phases.append({"phase": event["phase"], "agents": event["agents"],
+                           "start": event["timestamp"], "end": None, "by_agent": {}})
+        elif kind == "verdict":
+            since = iterations[-1]["end"] if iterations else (phases[-1]["start"] if phases else started)
+            iterations.append({"iteration": event["iteration"], "verdict": event["verdict"],
+                               "start": since, "end": event["timestamp"]})
+        previous = event["timestamp"]
+
+    for phase in phases:
+        phase["open"] = phase["end"] is None and finished is None
+        phase["end"] = phase["end"] or end
+    for item in phases + iterations:
+        item["seconds"] = (parse_time(item["end"]) - parse_time(item["start"])).total_seconds()
+
+    critical_path = []
+    for phase in phases:
+        if phase["by_agent"]:
+            agent, seconds = max(phase["by_agent"].items(), key=lambda kv: kv[1])
+        else:
+            agent, seconds = phase["agents"], phase["seconds"]
+        critical_path.append({"phase": phase["phase"], "agent": agent, "seconds": seconds})
+    bottleneck = max(phases, key=lambda p: p["seconds"])["phase"] if phases else None
+    total = (parse_time(end) - parse_time(started)).total_seconds() if started else 0
+
+    return {
+        "started": started,
+        "finished": finished,
+        "total_seconds": total,
+        "phases": phases,
+        "iterations": iterations,
+        "agents": [{"agent": a, "seconds": s} for a, s in sorted(agents.items(), key=lambda kv: -kv[1])],
+        "critical_path": critical_path,
+        "bottleneck": bottleneck,
+    }
+
+
+def print_report(report: dict) -> None:
+    total = report["total_seconds"] or 1
+    status = "completed" if report["finished"] else "in progress"
+    print("# Workflow Timing Report\n")
+    print(f"Total: {format_duration(report['total_seconds'])} ({status})\n")
+
+    print("## Phases\n")
+    print("| Phase | Agents | Start | Duration | Share |")
+    print("|-------|--------|-------|----------|-------|")
+    for p in report["phases"]:
+        duration = format_duration(p["seconds"]) + (" (open)" if p["open"] else "")
+        print(f"| {p['phase']} | {p['agents']} | {p['start']} | {duration} | {p['seconds'] / total:.0%} |")
+
+    if report["iterations"]:
+        print("\n## Review Iterations\n")
+        print("| Iteration | Verdict | Duration |")
+        print("|-----------|---------|----------|")
+        for i in report["iterations"]:
+            print(f"| {i['iteration']} | {i['verdict']} | {format_duration(i['seconds'])} |")
+
+    print("\n## Agents\n")
+    print("| Agent | Time | Share |")
+    print("|-------|------|-------|")
+    for a in report["agents"]:
+        print(f"| {a['agent']} | {format_duration(a['seconds'])} | {a['seconds'] / total:.0%} |")
+
+    if report["critical_path"]:
+        path = " → ".join(f"{c['phase']} [{c['agent']}, {format_duration(c['seconds'])}]"
+                          for c in report["critical_path"])
+        print(f"\n## Critical Path\n\n{path}\n")
+        print(f"Bottleneck: {report['bottleneck']}")
+
+
+def build_usage(events: list[dict]) -> dict:
+    """Sum invocation tokens and latency by agent, phase and iteration.
+
+    Invocations without an explicit iteration are assigned the review
+    iteration in progress: one past the last verdict, once any verdict has
+    been logged in the current phase.
+    """
+    totals = {"invocations": 0, "input_tokens": 0, "output_tokens": 0, "latency_seconds": 0.0}
+    groups = {"agent": {}, "model": {}, "phase": {}, "iteration": {}}
+    phase = None
+    last_verdict = 0
+    review = False
+    for event in events:
+        kind = event["type"]
+        if kind == "phase":
+            phase, review = event["phase"], False
+        elif kind == "verdict":
+            last_verdict, review = event["iteration"], True
+        elif kind == "invocation":
+            iteration = event.get("iteration") or (last_verdict + 1 if review else None)
+            keys = {"agent": event["agent"], "model": event["model"], "phase": phase or "-",
+                    "iteration": str(iteration) if iteration else "-"}
+            for bucket in [totals] + [groups[g].setdefault(k, {"invocations": 0, "input_tokens": 0,
+                                                               "output_tokens": 0, "latency_seconds": 0.0})
+                                      for g, k in keys.items()]:
+                bucket["invocations"] += 1
+                bucket["input_tokens"] += event["input_tokens"]
+                bucket["output_tokens"] += event["output_tokens"]
+                bucket["latency_seconds"] += event["latency_seconds"]
+    return {"total": totals, **{f"by_{g}": v for g, v in groups.items()}}
+
+
+def print_usage(usage: dict, index: dict | None) -> None:
+    total = usage["total"]
+    tokens = total["input_tokens"] + total["output_tokens"]
+    print("# Agent Invocation Usage\n")
+    print(f"Invocations: {total['invocations']}, tokens: {tokens:,} "
+          f"({total['input_tokens']:,} in / {total['output_tokens']:,} out), "
+          f"latency: {format_duration(total['latency_seconds'])}")
+    if index and index.get("token_budget"):
+        print(f"Token budget: {tokens / index['token_budget']:.0%} of {index['token_budget']:,}")
+    if index and index.get("time_budget_minutes"):
+        print(f"Time budget: {index['time_budget_minutes']} min")
+    for group in ("agent", "model", "phase", "iteration"):
+        rows = usage[f"by_{group}"]
+        if not rows:
+            continue
+        print(f"\n## By {group}\n")
+        print(f"| {group.capitalize()} | Calls | Input | Output | Latency |")
+        print("|------|-------|-------|--------|---------|")
+        for key, row in rows.items():
+            print(f"| {key} | {row['invocations']} | {row['input_tokens']:,} | {row['output_tokens']:,} | "
+                  f"{format_duration(row['latency_seconds'])} |")
+
+
+def cmd_usage(args):
+    usage = build_usage(load_events(args.folder))
+    if args.json:
+        print(json.dumps(usage, indent=2, ensure_ascii=False))
+    else:
+        print_usage(usage, load_index(args.folder))
+
+
+def cmd_report(args):
+    report = build_report(load_events(args.folder))
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        print_report(report)
+
+
+def span_id(*parts) -> str:
+    return hashlib.sha256("\x1f".join(str(p) for p in parts).encode("utf-8")).hexdigest()[:16]
+
+
+def unix_nano(ts: str) -> str:
+    return str(int(parse_time(ts).timestamp()) * 1_000_000_000)
+
+
+def otlp_attributes(values: dict) -> list[dict]:
+    attributes = []
+    for key, value in values.items():
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            attributes.append({"key": key, "value": {"boolValue": value}})
+        elif isinstance(value, int):
+            attributes.append({"key": key, "value": {"intValue": str(value)}})
+        elif isinstance(value, float):
+            attributes.append({"key": key, "value": {"doubleValue": value}})
+        else:
+            attributes.append({"key": key, "value": {"stringValue": str(value)}})
+    return attributes
+
+
+def agent_spans(chunk: list[tuple], parent: dict, phase_agents: str, span) -> list[dict]:
+    """One span per event/verdict, covering the time since the previous record."""
+    spans = []
+    for n, event, start in chunk:
+        agent = charged_agent(event, phase_agents)
+        attributes = {"workflow.agent": agent}
+        if event["type"] == "invocation":
+            attributes.update({
+                "gen_ai.request.model": event["model"],
+                "gen_ai.usage.input_tokens": event["input_tokens"],
+                "gen_ai.usage.output_tokens": event["output_tokens"],
+                "workflow.latency_seconds": event["latency_seconds"],
+            })
+        child = span(agent, ("agent", n), parent, start, event["timestamp"], attributes)
+        if event["type"] == "event":
+            child["events"].append({"timeUnixNano": unix_nano(event["timestamp"]),
+                                    "name": event["message"], "attributes": []})
+        spans.append(child)
+    return spans
+
+
+def build_trace(events: list[dict], service: str = "workflow") -> dict:
+    """Map the event records to an OTLP/JSON trace (workflow → phase → iteration → agent).
+
+    Trace and span IDs are hashes of the project, start time and span path,
+    so exporting the same log twice yields identical output.
+    """
+    timed = [e for e in events if e.get("timestamp")]
+    if not timed:
+        return {"resourceSpans": []}
+    init = next((e for e in timed if e["type"] == "init"), timed[0])
+    project = init.get("project", "")
+    started = init["timestamp"]
+    complete = next((e for e in timed if e["type"] == "complete"), None)
+    end = complete["timestamp"] if complete else timed[-1]["timestamp"]
+    trace_id = hashlib.sha256(f"{project}\x1f{started}".encode("utf-8")).hexdigest()[:32]
+
+    def span(name, key, parent, start, finish, attributes=None, status=None):
+        return {
+            "traceId": trace_id,
+            "spanId": span_id(trace_id, *key),
+            "parentSpanId": parent["spanId"] if parent else "",
+            "name": name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": unix_nano(start),
+            "endTimeUnixNano": unix_nano(finish),
+            "attributes": otlp_attributes(attributes or {}),
+            "events": [],
+            "status": status or {"code": 0},
+        }
+
+    root = span(f"workflow {project}".strip(), ("workflow",), None, started, end,
+                {"workflow.project": project, "workflow.completed": complete is not None,
+                 "workflow.iterations": complete.get("iterations") if complete else None})
+    spans = [root]
+
+    groups = []  # (index, phase record or None, [(index, event/verdict record)])
+    for n, event in enumerate(timed):
+        if event["type"] == "phase":
+            groups.append((n, event, []))
+        elif event["type"] in ("event", "verdict", "invocation"):
+            if not groups:
+                groups.append((None, None, []))
+            groups[-1][2].append((n, event))
+
+    for g, (n, head, records) in enumerate(groups):
+        if head:
+            finish = groups[g + 1][1]["timestamp"] if g + 1 < len(groups) else end
+            parent = span(head["phase"], ("phase", n), root, head["timestamp"], finish,
+                          {"workflow.phase": head["phase"], "workflow.agents": head["agents"]})
+            spans.append(parent)
+            agents, previous = head["agents"], head["timestamp"]
+        else:
+            parent, agents, previous = root, "", started
+        chunk = []
+        for m, event in records:
+            chunk.append((m, event, previous))
+            previous = event["timestamp"]
+            if event["type"] != "verdict":
+                continue
+            iteration = span(f"iteration {event['iteration']}", ("iteration", m), parent,
+                             chunk[0][2], event["timestamp"], {
+                                 "workflow.iteration": event["iteration"],
+                                 "review.verdict": event["verdict"],
+                                 "review.critical": event["critical"],
+                                 "review.major": event["major"],
+                                 "review.minor": event["minor"],
+                             }, {"code": 2, "message": "REJECTED"} if event["verdict"] == "REJECTED" else None)
+            spans.append(iteration)
+            spans.extend(agent_spans(chunk, iteration, agents, span))
+            chunk = []
+        spans.extend(agent_spans(chunk, parent, agents, span))
+
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": otlp_attributes({"service.name": service, "workflow.project": project})},
+            "scopeSpans": [{
+                "scope": {"name": "workflow-logger", "version": "1"},
+                "spans": spans,
+            }],
+        }],
+    }
+
+
+def cmd_export(args):
+    trace = build_trace(load_events(args.folder), args.service)
+    output = args.output or os.path.join(args.folder, "workflow_trace.otlp.json")
+    write_atomic(output, json.dumps(trace, indent=2, ensure_ascii=False))
+    count = sum(len(s["spans"]) for r in trace["resourceSpans"] for s in r["scopeSpans"])
+    print(f"Exported {count} span(s): {output}")
+
+
+def cmd_query(args):
+    types = set(t for value in args.type or [] for t in value.split(",") if t)
+    since = normalize_time_bound(args.since)
+    until = normalize_time_bound(args.until, end=True)
+    for event in load_events(args.folder):
+        ts = event.get("timestamp", "")
+        if types and event.get("type") not in types:
+            continue
+        if since and ts < since:
+            continue
+        if until and ts > until:
+            continue
+        print(json.dumps(event, ensure_ascii=False))
+
+
 def main():
     parser = argparse.ArgumentParser(description="Workflow markdown logger")
     subparsers = parser.add_subparsers(dest="command", required=True)
@@ -163,6 +1065,10 @@ def main():
     p_init = subparsers.add_parser("init", help="Initialize workflow log")
     p_init.add_argument("--folder", required=True, help="Path to generated_docs folder")
     p_init.add_argument("--project", required=True, help="Project name")
+    p_init.add_argument("--segment-bytes", type=int, default=SEGMENT_MAX_BYTES,
+                        help=f"Rotate workflow_log.md into numbered segments above this size (default: {SEGMENT_MAX_BYTES})")
+    p_init.add_argument("--token-budget", type=int, help="Warn as invocation tokens approach this total")
+    p_init.add_argument("--time-budget", type=float, help="Warn as elapsed workflow time approaches this many minutes")
     p_init.set_defaults(func=cmd_init)
 
     # phase
@@ -176,6 +1082,7 @@ def main():
     p_event = subparsers.add_parser("event", help="Log an event")
     p_event.add_argument("--folder", required=True, help="Path to generated_docs folder")
     p_event.add_argument("--message", required=True, help="Event message")
+    p_event.add_argument("--agent", help="Agent that produced the event (used by 'report')")
     p_event.set_defaults(func=cmd_event)
 
     # verdict
@@ -190,12 +1097,74 @@ def main():
     p_verdict.add_argument("--issues", required=False, default="", help='JSON array of issues: [{"severity":"CRITICAL","section":"4","issue":"desc","action":"fix"}]')
     p_verdict.set_defaults(func=cmd_verdict)
 
+    # invocation
+    p_invocation = subparsers.add_parser("invocation", help="Log one agent call with tokens and latency")
+    p_invocation.add_argument("--folder", required=True, help="Path to generated_docs folder")
+    p_invocation.add_argument("--agent", required=True, help="Agent name")
+    p_invocation.add_argument("--model", required=True, help="Model used for the call")
+    p_invocation.add_argument("--input-tokens", required=True, type=int, help="Prompt tokens")
+    p_invocation.add_argument("--output-tokens", required=True, type=int, help="Completion tokens")
+    p_invocation.add_argument("--latency", required=True, type=float, help="Wall time of the call in seconds")
+    p_invocation.add_argument("--iteration", type=int, help="Review iteration (inferred when omitted)")
+    p_invocation.set_defaults(func=cmd_invocation)
+
+    # budget
+    p_budget = subparsers.add_parser("budget", help="Set token/time budgets for an existing log")
+    p_budget.add_argument("--folder", required=True, help="Path to generated_docs folder")
+    p_budget.add_argument("--tokens", type=int, help="Token budget (0 removes it)")
+    p_budget.add_argument("--minutes", type=float, help="Time budget in minutes (0 removes it)")
+    p_budget.set_defaults(func=cmd_budget)
+
     # complete
     p_complete = subparsers.add_parser("complete", help="Log workflow completion")
     p_complete.add_argument("--folder", required=True, help="Path to generated_docs folder")
     p_complete.add_argument("--iterations", required=True, type=int, help="Total iterations")
     p_complete.set_defaults(func=cmd_complete)
 
+    # batch
+    p_batch = subparsers.add_parser("batch", help="Append a JSONL stream of records in one write")
+    p_batch.add_argument("--folder", required=True, help="Path to generated_docs folder")
+    p_batch.add_argument("--input", default="-", help="JSONL file with one record per line (default: stdin)")
+    p_batch.set_defaults(func=cmd_batch)
+
+    # render
+    p_render = subparsers.add_parser("render", help="Regenerate markdown from workflow_log.jsonl")
+    p_render.add_argument("--folder", required=True, help="Path to generated_docs folder")
+    p_render.add_argument("--output", help="Write markdown here instead of stdout")
+    p_render.set_defaults(func=cmd_render)
+
+    # compact
+    p_compact = subparsers.add_parser("compact", help="Condense completed phases into summaries")
+    p_compact.add_argument("--folder", required=True, help="Path to generated_docs folder")
+    p_compact.set_defaults(func=cmd_compact)
+
+    # report
+    p_report = subparsers.add_parser("report", help="Phase, iteration and agent timing with critical path")
+    p_report.add_argument("--folder", required=True, help="Path to generated_docs folder")
+    p_report.add_argument("--json", action="store_true", help="Output JSON instead of markdown tables")
+    p_report.set_defaults(func=cmd_report)
+
+    # export
+    p_export = subparsers.add_parser("export", help="Write an OTLP/JSON trace file for offline import")
+    p_export.add_argument("--folder", required=True, help="Path to generated_docs folder")
+    p_export.add_argument("--output", help="Trace file (default: <folder>/workflow_trace.otlp.json)")
+    p_export.add_argument("--service", default="workflow", help="service.name resource attribute (default: workflow)")
+    p_export.set_defaults(func=cmd_export)
+
+    # usage
+    p_usage = subparsers.add_parser("usage", help="Aggregate invocation tokens and latency")
+    p_usage.add_argument("--folder", required=True, help="Path to generated_docs folder")
+    p_usage.add_argument("--json", action="store_true", help="Output JSON instead of markdown tables")
+    p_usage.set_defaults(func=cmd_usage)
+
+    # query
+    p_query = subparsers.add_parser("query", help="Filter structured events as JSONL")
+    p_query.add_argument("--folder", required=True, help="Path to generated_docs folder")
+    p_query.add_argument("--type", action="append", help="Event type(s): init,phase,event,verdict,invocation,complete")
+    p_query.add_argument("--since", help="Only events at or after YYYY-MM-DD[ HH:MM[:SS]]")
+    p_query.add_argument("--until", help="Only events at or before YYYY-MM-DD[ HH:MM[:SS]]")
+    p_query.set_defaults(func=cmd_query)
+
     args = parser.parse_args()
     args.func(args)
 
@@ -0,0 +1,195 @@
+"""Tests for workflow-logger.py batch validation and the OTLP/JSON trace export."""
+
+import importlib.util
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import unittest
+from datetime import datetime
+
+WORKFLOW_LOGGER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                               "scripts", "workflow-logger.py")
+
+FIXTURE = [
+    {"type": "init", "timestamp": "2026-03-02 10:00:00", "project": "demo"},
+    {"type": "phase", "timestamp": "2026-03-02 10:00:05", "phase": "Design", "agents": "architect, critic"},
+    {"type": "event", "timestamp": "2026-03-02 10:02:00", "message": "Draft written", "agent": "architect"},
+    {"type": "invocation", "timestamp": "2026-03-02 10:03:00", "agent": "critic", "model": "m1",
+     "input_tokens": 1200, "output_tokens": 300, "latency_seconds": 4.5},
+    {"type": "verdict", "timestamp": "2026-03-02 10:04:00", "iteration": 1, "verdict": "REJECTED",
+     "critical": 1, "major": 2, "minor": 0, "summary": "Missing monitoring", "issues": []},
+    {"type": "event", "timestamp": "2026-03-02 10:06:00", "message": "Revised", "agent": "architect"},
+    {"type": "verdict", "timestamp": "2026-03-02 10:08:00", "iteration": 2, "verdict": "APPROVED",
+     "critical": 0, "major": 0, "minor": 1, "summary": "", "issues": []},
+    {"type": "complete", "timestamp": "2026-03-02 10:09:00", "iterations": 2, "processing_seconds": 540.0},
+]
+
+HEX32 = re.compile(r"^[0-9a-f]{32}$")
+HEX16 = re.compile(r"^[0-9a-f]{16}$")
+VALUE_KEYS = {"stringValue", "boolValue", "intValue", "doubleValue", "arrayValue", "kvlistValue", "bytesValue"}
+
+
+def load_workflow_logger():
+    spec = importlib.util.spec_from_file_location("workflow_logger", WORKFLOW_LOGGER)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def nanos(ts: str) -> str:
+    return str(int(datetime.strptime(ts, "%Y-%m-%d %H:%M:%S").timestamp()) * 1_000_000_000)
+
+
+class OtlpTraceTest(unittest.TestCase):
+    def setUp(self):
+        self.workflow_logger = load_workflow_logger()
+        self.trace = self.workflow_logger.build_trace(FIXTURE, service="docs")
+
+    def assert_attributes(self, attributes):
+        self.assertIsInstance(attributes, list)
+        for attribute in attributes:
+            self.assertEqual(set(attribute), {"key", "value"})
+            self.assertIsInstance(attribute["key"], str)
+            self.assertEqual(len(attribute["value"]), 1)
+            kind, value = next(iter(attribute["value"].items()))
+            self.assertIn(kind, VALUE_KEYS)
+            if kind == "intValue":
+                self.assertIsInstance(value, str)  # int64 is a JSON string in OTLP/JSON
+                int(value)
+
+    def spans(self):
+        return self.trace["resourceSpans"][0]["scopeSpans"][0]["spans"]
+
+    def test_envelope(self):
+        self.assertEqual(set(self.trace), {"resourceSpans"})
+        self.assertEqual(len(self.trace["resourceSpans"]), 1)
+        resource_spans = self.trace["resourceSpans"][0]
+        self.assert_attributes(resource_spans["resource"]["attributes"])
+        self.assertIn({"key": "service.name", "value": {"stringValue": "docs"}},
+                      resource_spans["resource"]["attributes"])
+        self.assertEqual(len(resource_spans["scopeSpans"]), 1)
+        scope_spans = resource_spans["scopeSpans"][0]
+        self.assertIsInstance(scope_spans["scope"]["name"], str)
+        self.assertTrue(scope_spans["spans"])
+
+    def test_span_fields(self):
+        trace_ids = set()
+        for span in self.spans():
+            for key in ("traceId", "spanId", "parentSpanId", "name", "kind",
+                        "startTimeUnixNano", "endTimeUnixNano", "attributes", "status"):
+                self.assertIn(key, span)
+            self.assertRegex(span["traceId"], HEX32)
+            self.assertNotEqual(span["traceId"], "0" * 32)
+            self.assertRegex(span["spanId"], HEX16)
+            self.assertNotEqual(span["spanId"], "0" * 16)
+            self.assertIsInstance(span["kind"], int)
+            for field in ("startTimeUnixNano", "endTimeUnixNano"):
+                self.assertIsInstance(span[field], str)
+                self.assertRegex(span[field], r"^\d+$")
+            self.assertLessEqual(int(span["startTimeUnixNano"]), int(span["endTimeUnixNano"]))
+            self.assert_attributes(span["attributes"])
+            for event in span.get("events", []):
+                self.assertRegex(event["timeUnixNano"], r"^\d+$")
+                self.assert_attributes(event["attributes"])
+            trace_ids.add(span["traceId"])
+        self.assertEqual(len(trace_ids), 1)
+
+    def test_parent_linkage(self):
+        spans = self.spans()
+        by_id = {span["spanId"]: span for span in spans}
+        self.assertEqual(len(by_id), len(spans))
+        roots = [span for span in spans if span["parentSpanId"] == ""]
+        self.assertEqual([root["name"] for root in roots], ["workflow demo"])
+        for span in spans:
+            if span["parentSpanId"]:
+                self.assertIn(span["parentSpanId"], by_id)
+
+        def parent_name(span):
+            return by_id[span["parentSpanId"]]["name"]
+
+        names = {span["name"]: span for span in spans}
+        self.assertEqual(parent_name(names["Design"]), "workflow demo")
+        self.assertEqual(parent_name(names["iteration 1"]), "Design")
+        self.assertEqual(parent_name(names["iteration 2"]), "Design")
+        self.assertEqual(sorted(parent_name(s) for s in spans if s["name"] in ("architect", "critic")),
+                         ["iteration 1", "iteration 1", "iteration 2"])
+        self.assertEqual(names["iteration 1"]["status"]["code"], 2)
+
+    def test_nanosecond_timestamps(self):
+        root = next(span for span in self.spans() if span["parentSpanId"] == "")
+        self.assertEqual(root["startTimeUnixNano"], nanos("2026-03-02 10:00:00"))
+        self.assertEqual(root["endTimeUnixNano"], nanos("2026-03-02 10:09:00"))
+
+    def test_export_matches_build_trace(self):
+        with tempfile.TemporaryDirectory() as folder:
+            with open(os.path.join(folder, "workflow_log.jsonl"), "w") as f:
+                f.writelines(json.dumps(record) + "\n" for record in FIXTURE)
+            output = os.path.join(folder, "trace.json")
+            subprocess.run([sys.executable, WORKFLOW_LOGGER, "export", "--folder", folder,
+                            "--output", output, "--service", "docs"], check=True, capture_output=True)
+            with open(output) as f:
+                self.assertEqual(json.load(f), self.trace)
+
+
+class BatchValidationTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.folder = self.tmp.name
+        self.logger("init", "--project", "demo")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def logger(self, *args, stdin=None):
+        return subprocess.run([sys.executable, WORKFLOW_LOGGER, args[0], "--folder", self.folder, *args[1:]],
+                              input=stdin, capture_output=True, text=True)
+
+    def test_non_numeric_field_rejects_batch(self):
+        with open(os.path.join(self.folder, "workflow_log.jsonl")) as f:
+            before = f.read()
+        lines = [{"type": "event", "message": "ok"},
+                 {"type": "verdict", "iteration": "abc", "verdict": "REJECTED",
+                  "critical": 1, "major": 0, "minor": 0}]
+
+        result = self.logger("batch", stdin="".join(json.dumps(line) + "\n" for line in lines))
+
+        self.assertEqual(result.returncode, 1)
+        self.assertIn("Error: Line 2: 'iteration' must be an integer", result.stderr)
+        self.assertNotIn("Traceback", result.stderr)
+        with open(os.path.join(self.folder, "workflow_log.jsonl")) as f:
+            self.assertEqual(f.read(), before)
+
+
+class BudgetWarningTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.folder = self.tmp.name
+        self.logger("init", "--project", "demo", "--token-budget", "1000")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def logger(self, *args):
+        return subprocess.run([sys.executable, WORKFLOW_LOGGER, args[0], "--folder", self.folder, *args[1:]],
+                              check=True, capture_output=True, text=True)
+
+    def invocation(self, tokens: int) -> str:
+        return self.logger("invocation", "--agent", "critic", "--model", "m1", "--input-tokens", str(tokens),
+                           "--output-tokens", "0", "--latency", "1").stderr
+
+    def test_each_level_warns_once(self):
+        self.assertIn("Budget warning: token budget 85% used", self.invocation(850))
+        self.assertEqual(self.invocation(10), "")
+        self.assertIn("Budget exceeded: token budget 106% used", self.invocation(200))
+        self.assertEqual(self.invocation(10), "")
+        with open(os.path.join(self.folder, "workflow_log.jsonl")) as f:
+            budget_events = [r for r in map(json.loads, f) if r.get("budget")]
+        self.assertEqual([r["message"].split(":")[0] for r in budget_events],
+                         ["Budget warning", "Budget exceeded"])
+
+
+if __name__ == "__main__":
+    unittest.main()
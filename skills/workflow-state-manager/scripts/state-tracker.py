@@ -1,63 +1,458 @@
 #!/usr/bin/env python3
 """Workflow state tracker for multi-agent design workflows.
 
-Manages workflow_state.json in the generated_docs folder.
+Manages workflow state in the generated_docs folder.
 Tracks phase, iteration, verdict, and document status.
+
+Every change is appended as one event to workflow_state.journal.jsonl. State
+is rebuilt from workflow_state.snapshot.json plus the journal tail; every
+SNAPSHOT_EVERY events a new snapshot is taken and the covered journal lines
+move to workflow_state.history.jsonl. workflow_state.json is rewritten after
+each change as a materialized view for existing readers, with the most
+recent HISTORY_VIEW_LIMIT history entries.
+
+Updates hold an exclusive flock on .workflow_state.lock for the whole
+read-modify-write, and each applied event bumps the state 'version'. Passing
+--expect-version makes an update fail with exit code 3 when another writer
+got there first, so callers can re-read and retry.
+
+Every change is also upserted into an SQLite registry shared by all
+generated_docs folders (default: .workflow_registry.sqlite next to them,
+overridable with --registry or WORKFLOW_REGISTRY), which 'list' queries
+without opening each folder.
+
+'history' filters the archived and journaled events by time, event type and
+iteration. workflow_state.history.idx.json summarizes each block appended to
+the archive (byte range, time span, event types, iterations), so queries
+only read the blocks that can match.
 """
 
 import argparse
 import json
 import os
+import random
+import re
+import sqlite3
 import sys
-from datetime import datetime
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to unlocked atomic writes
+    fcntl = None
+
+
+SNAPSHOT_EVERY = 100
+HISTORY_VIEW_LIMIT = 200
+
+LOCK_TIMEOUT = 30.0
+LOCK_BACKOFF_INITIAL = 0.01
+LOCK_BACKOFF_MAX = 0.5
+EXIT_CONFLICT = 3
+
+REGISTRY_ENV = "WORKFLOW_REGISTRY"
+REGISTRY_NAME = ".workflow_registry.sqlite"
 
 
 def get_state_path(folder: str) -> str:
     return os.path.join(folder, "workflow_state.json")
 
 
-def load_state(folder: str) -> dict:
-    path = get_state_path(folder)
-    if not os.path.exists(path):
+def get_journal_path(folder: str) -> str:
+    return os.path.join(folder, "workflow_state.journal.jsonl")
+
+
+def get_snapshot_path(folder: str) -> str:
+    return os.path.join(folder, "workflow_state.snapshot.json")
+
+
+def get_history_path(folder: str) -> str:
+    return os.path.join(folder, "workflow_state.history.jsonl")
+
+
+def get_history_index_path(folder: str) -> str:
+    return os.path.join(folder, "workflow_state.history.idx.json")
+
+
+def get_lock_path(folder: str) -> str:
+    return os.path.join(folder, ".workflow_state.lock")
+
+
+def get_registry_path(folder: Optional[str], registry: Optional[str] = None) -> str:
+    """--registry, then $WORKFLOW_REGISTRY, then the parent of the generated_docs folder."""
+    if registry:
+        return registry
+    if os.environ.get(REGISTRY_ENV):
+        return os.environ[REGISTRY_ENV]
+    parent = os.path.dirname(os.path.abspath(folder)) if folder else os.getcwd()
+    return os.path.join(parent, REGISTRY_NAME)
+
+
+def open_registry(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, timeout=LOCK_TIMEOUT)
+    conn.execute("""CREATE TABLE IF NOT EXISTS workflows (
+        folder TEXT PRIMARY KEY,
+        project TEXT,
+        phase TEXT,
+        iteration INTEGER,
+        verdict TEXT,
+        version INTEGER,
+        started TEXT,
+        updated TEXT
+    )""")
+    conn.execute("CREATE INDEX IF NOT EXISTS workflows_phase_updated ON workflows (phase, updated)")
+    conn.execute("CREATE INDEX IF NOT EXISTS workflows_updated ON workflows (updated)")
+    return conn
+
+
+def register_state(folder: str, state: dict, updated: str, registry: Optional[str] = None) -> None:
+    """Upsert the folder's summary row; registry errors only warn."""
+    path = get_registry_path(folder, registry)
+    try:
+        with open_registry(path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO workflows VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (os.path.abspath(folder), state["project"], state["phase"], state["iteration"],
+                 state["verdict"], state.get("version", 0), state["started"], updated),
+            )
+        conn.close()
+    except sqlite3.Error as e:
+        print(f"Warning: Could not update registry {path}: {e}", file=sys.stderr)
+
+
+@contextmanager
+def state_lock(folder: str, timeout: float = LOCK_TIMEOUT, shared: bool = False):
+    """Hold a flock on the sidecar lock file, exclusive unless shared is set.
+
+    The lock lives on a separate file because atomic renames replace the
+    state file inodes. Contention is retried with jittered exponential backoff.
+    Readers take it shared so they never see a snapshot and journal from
+    different sides of take_snapshot.
+    """
+    if fcntl is None:
+        yield
+        return
+    with open(get_lock_path(folder), "a") as lock_file:
+        deadline = time.monotonic() + timeout
+        delay = LOCK_BACKOFF_INITIAL
+        while True:
+            try:
+                fcntl.flock(lock_file.fileno(), (fcntl.LOCK_SH if shared else fcntl.LOCK_EX) | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    print(f"Error: Timed out after {timeout}s waiting for lock on {folder}", file=sys.stderr)
+                    sys.exit(1)
+                time.sleep(delay * random.uniform(0.5, 1.5))
+                delay = min(delay * 2, LOCK_BACKOFF_MAX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def write_atomic(path: str, content: str) -> None:
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp",
+                                    dir=os.path.dirname(path) or ".")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(path):
+            os.chmod(tmp_path, os.stat(path).st_mode & 0o777)
+        else:
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(tmp_path, 0o666 & ~umask)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def new_state(project: str, started: str) -> dict:
+    return {
+        "project": project,
+        "started": started,
+        "phase": "research",
+        "iteration": 0,
+        "max_iterations": 5,
+        "verdict": None,
+        "documents": {
+            "solution_design": "not_started"
+        },
+        "research_files": [],
+        "history": [],
+        "history_total": 0,
+        "version": 0,
+    }
+
+
+def apply_event(state: dict, event: dict) -> str:
+    """Apply one journal event to state in place and return its history message."""
+    op = event["op"]
+    if op == "init":
+        state.clear()
+        state.update(new_state(event["project"], event["timestamp"]))
+        message = "Workflow initialized"
+    elif op == "set-phase":
+        message = f"Phase changed: {state['phase']} -> {event['phase']}"
+        state["phase"] = event["phase"]
+    elif op == "increment-iteration":
+        state["iteration"] += 1
+        message = f"Iteration incremented to {state['iteration']}/{state['max_iterations']}"
+    elif op == "set-verdict":
+        state["verdict"] = event["verdict"]
+        if event["verdict"] == "APPROVED":
+            state["documents"]["solution_design"] = "approved"
+        elif event["verdict"] in ("CONDITIONAL", "REJECTED"):
+            state["documents"]["solution_design"] = "in_review"
+        message = f"Verdict set: {event['verdict']}"
+    elif op == "add-research":
+        if event["file"] not in state["research_files"]:
+            state["research_files"].append(event["file"])
+        message = f"Research file added: {event['file']}"
+    else:
+        raise ValueError(f"unknown journal op '{op}'")
+    state["version"] = event["seq"]
+    state["history"].append({"timestamp": event["timestamp"], "event": message})
+    del state["history"][:-HISTORY_VIEW_LIMIT]
+    state["history_total"] += 1
+    return message
+
+
+def read_journal(folder: str) -> list[dict]:
+    events = []
+    path = get_journal_path(folder)
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            for line in f:
+                if line.strip():
+                    try:
+                        events.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        continue  # tolerate a torn final line after a crash
+    return events
+
+
+def migrate_legacy_state(folder: str) -> dict:
+    """Seed snapshot and history archive from a pre-journal workflow_state.json."""
+    with open(get_state_path(folder), "r") as f:
+        state = json.load(f)
+    history = state.get("history", [])
+    events = []
+    iteration = 0
+    for entry in history:
+        m = re.search(r"Iteration incremented to (\d+)", entry.get("event", ""))
+        if m:
+            iteration = int(m.group(1))
+        events.append({"seq": 0, "op": "legacy", "iteration": iteration, **entry})
+    archive_events(folder, events)
+    state["history"] = history[-HISTORY_VIEW_LIMIT:]
+    state["history_total"] = len(history)
+    state["version"] = 0
+    write_atomic(get_snapshot_path(folder), json.dumps(state, indent=2, default=str))
+    return state
+
+
+def load_state(folder: str) -> tuple[dict, list[dict]]:
+    """Rebuild state from the latest snapshot plus the journal tail.
+
+    Returns the state and the journal events read, so callers can tell how
+    far the journal has grown since the last snapshot.
+    """
+    snapshot_path = get_snapshot_path(folder)
+    if os.path.exists(snapshot_path):
+        with open(snapshot_path, "r") as f:
+            state = json.load(f)
+    elif os.path.exists(get_journal_path(folder)):
+        state = None
+    elif os.path.exists(get_state_path(folder)):
+        state = migrate_legacy_state(folder)
+    else:
+        path = get_state_path(folder)
         print(f"Error: No state file found at {path}", file=sys.stderr)
         print("Run 'init' first to create workflow state.", file=sys.stderr)
         sys.exit(1)
-    with open(path, "r") as f:
-        return json.load(f)
+
+    journal = read_journal(folder)
+    for event in journal:
+        if state is not None and event["seq"] <= state["version"]:
+            continue  # already covered by the snapshot
+        if state is None:
+            state = {}
+        apply_event(state, event)
+    if state is None:
+        print(f"Error: Journal at {get_journal_path(folder)} has no events. Run 'init' again.", file=sys.stderr)
+        sys.exit(1)
+    return state, journal
+
+
+def needs_migration(folder: str) -> bool:
+    return not (os.path.exists(get_snapshot_path(folder)) or os.path.exists(get_journal_path(folder)))
+
+
+@contextmanager
+def read_lock(folder: str, timeout: float = LOCK_TIMEOUT):
+    """Shared state lock for readers; exclusive while a legacy folder still needs migrating."""
+    if not os.path.isdir(folder):
+        yield  # load_state reports the missing state
+        return
+    with state_lock(folder, timeout, shared=not needs_migration(folder)):
+        yield
+
+
+def last_archived_seq(folder: str) -> int:
+    """Read the seq of the final line of the history archive without scanning it."""
+    path = get_history_path(folder)
+    if not os.path.exists(path):
+        return 0
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - 4096))
+        lines = f.read().splitlines()
+    for line in reversed(lines):
+        try:
+            return json.loads(line)["seq"]
+        except (ValueError, KeyError):
+            continue
+    return 0
+
+
+def block_summary(events: list[dict], offset: int, length: int) -> dict:
+    iterations = [e.get("iteration", 0) for e in events]
+    return {
+        "offset": offset,
+        "length": length,
+        "count": len(events),
+        "first": events[0]["timestamp"],
+        "last": events[-1]["timestamp"],
+        "ops": sorted({e["op"] for e in events}),
+        "iterations": [min(iterations), max(iterations)],
+    }
+
+
+def load_history_index(folder: str) -> dict:
+    """Load the archive block index, rebuilding it if it does not match the archive size."""
+    path = get_history_path(folder)
+    size = os.path.getsize(path) if os.path.exists(path) else 0
+    try:
+        with open(get_history_index_path(folder), "r") as f:
+            index = json.load(f)
+        if index.get("size") == size:
+            return index
+    except (OSError, ValueError):
+        pass
+
+    index = {"size": 0, "blocks": []}
+    if size:
+        with open(path, "rb") as f:
+            offset = 0
+            while True:
+                lines = [line for _, line in zip(range(SNAPSHOT_EVERY), f)]
+                events = []
+                for line in lines:
+                    try:
+                        events.append(json.loads(line))
+                    except ValueError:
+                        continue
+                length = sum(len(line) for line in lines)
+                if events:
+                    index["blocks"].append(block_summary(events, offset, length))
+                offset += length
+                if len(lines) < SNAPSHOT_EVERY:
+                    break
+        index["size"] = offset
+    write_atomic(get_history_index_path(folder), json.dumps(index))
+    return index
+
+
+def archive_events(folder: str, events: list[dict]) -> None:
+    """Append events to the history archive as one indexed block."""
+    if not events:
+        return
+    index = load_history_index(folder)
+    data = "".join(json.dumps(e, default=str) + "\n" for e in events).encode("utf-8")
+    with open(get_history_path(folder), "ab") as f:
+        offset = f.seek(0, os.SEEK_END)
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    index["blocks"].append(block_summary(events, offset, len(data)))
+    index["size"] = offset + len(data)
+    write_atomic(get_history_index_path(folder), json.dumps(index))
+
+
+def take_snapshot(folder: str, state: dict, journal: list[dict]) -> None:
+    """Write a snapshot, archive the journal events it covers, then truncate the journal.
+
+    Each step is safe to repeat: events already in the archive are skipped
+    and events already in the snapshot are ignored on rebuild.
+    """
+    write_atomic(get_snapshot_path(folder), json.dumps(state, indent=2, default=str))
+    archived = last_archived_seq(folder)
+    archive_events(folder, [e for e in journal if archived < e["seq"] <= state["version"]])
+    write_atomic(get_journal_path(folder), "")
 
 
 def save_state(folder: str, state: dict) -> None:
     path = get_state_path(folder)
-    with open(path, "w") as f:
-        json.dump(state, f, indent=2, default=str)
+    write_atomic(path, json.dumps(state, indent=2, default=str))
     print(f"State saved: {path}")
 
 
-def add_history(state: dict, event: str) -> None:
-    state["history"].append({
-        "timestamp": datetime.now().isoformat(),
-        "event": event
-    })
+def record_event(folder: str, op: str, expect_version: Optional[int] = None,
+                 lock_timeout: float = LOCK_TIMEOUT, registry: Optional[str] = None,
+                 **fields) -> tuple[dict, str]:
+    """Append one event to the journal, snapshot when due, and refresh the view.
+
+    The whole read-modify-write runs under the state lock. With
+    expect_version, the update is refused when the current version differs.
+    """
+    with state_lock(folder, lock_timeout):
+        state, journal = load_state(folder)
+        if expect_version is not None and state["version"] != expect_version:
+            print(f"Conflict: expected version {expect_version}, current version is {state['version']}",
+                  file=sys.stderr)
+            sys.exit(EXIT_CONFLICT)
+        event = {"seq": state["version"] + 1, "timestamp": datetime.now().isoformat(), "op": op, **fields}
+        message = apply_event(state, event)
+        event["event"] = message
+        event["iteration"] = state["iteration"]
+        with open(get_journal_path(folder), "a") as f:
+            f.write(json.dumps(event, default=str) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        journal.append(event)
+        if len(journal) >= SNAPSHOT_EVERY:
+            take_snapshot(folder, state, journal)
+        save_state(folder, state)
+        register_state(folder, state, event["timestamp"], registry)
+    return state, message
 
 
 def cmd_init(args):
     folder = args.folder
     os.makedirs(folder, exist_ok=True)
-    state = {
-        "project": args.project or os.path.basename(folder),
-        "started": datetime.now().isoformat(),
-        "phase": "research",
-        "iteration": 0,
-        "max_iterations": 5,
-        "verdict": None,
-        "documents": {
-            "solution_design": "not_started"
-        },
-        "research_files": [],
-        "history": []
-    }
-    add_history(state, "Workflow initialized")
-    save_state(folder, state)
+    with state_lock(folder, args.lock_timeout):
+        for path in (get_snapshot_path(folder), get_history_path(folder), get_history_index_path(folder)):
+            if os.path.exists(path):
+                os.remove(path)
+        state = new_state(args.project or os.path.basename(folder), datetime.now().isoformat())
+        event = {"seq": 1, "timestamp": state["started"], "op": "init", "project": state["project"]}
+        event["event"] = apply_event(state, event)
+        event["iteration"] = 0
+        write_atomic(get_journal_path(folder), json.dumps(event, default=str) + "\n")
+        save_state(folder, state)
+        register_state(folder, state, state["started"], args.registry)
     print(json.dumps(state, indent=2, default=str))
 
 
@@ -66,21 +461,16 @@ def cmd_set_phase(args):
     if args.phase not in valid_phases:
         print(f"Error: Invalid phase '{args.phase}'. Must be one of: {valid_phases}", file=sys.stderr)
         sys.exit(1)
-    state = load_state(args.folder)
-    old_phase = state["phase"]
-    state["phase"] = args.phase
-    add_history(state, f"Phase changed: {old_phase} -> {args.phase}")
-    save_state(args.folder, state)
-    print(f"Phase: {old_phase} -> {args.phase}")
+    state, message = record_event(args.folder, "set-phase", args.expect_version, args.lock_timeout,
+                                  args.registry, phase=args.phase)
+    print(message.replace("Phase changed", "Phase"))
 
 
 def cmd_increment_iteration(args):
-    state = load_state(args.folder)
-    state["iteration"] += 1
+    state, _ = record_event(args.folder, "increment-iteration", args.expect_version, args.lock_timeout,
+                            args.registry)
     iteration = state["iteration"]
     max_iter = state["max_iterations"]
-    add_history(state, f"Iteration incremented to {iteration}/{max_iter}")
-    save_state(args.folder, state)
     print(f"Iteration: {iteration}/{max_iter}")
     if iteration >= max_iter:
         print(f"WARNING: Max iterations ({max_iter}) reached!", file=sys.stderr)
@@ -91,31 +481,139 @@ def cmd_set_verdict(args):
     if args.verdict not in valid_verdicts:
         print(f"Error: Invalid verdict '{args.verdict}'. Must be one of: {valid_verdicts}", file=sys.stderr)
         sys.exit(1)
-    state = load_state(args.folder)
-    state["verdict"] = args.verdict
-    if args.verdict == "APPROVED":
-        state["documents"]["solution_design"] = "approved"
-    elif args.verdict in ("CONDITIONAL", "REJECTED"):
-        state["documents"]["solution_design"] = "in_review"
-    add_history(state, f"Verdict set: {args.verdict}")
-    save_state(args.folder, state)
+    record_event(args.folder, "set-verdict", args.expect_version, args.lock_timeout, args.registry,
+                 verdict=args.verdict)
     print(f"Verdict: {args.verdict}")
 
 
 def cmd_add_research(args):
-    state = load_state(args.folder)
-    if args.file not in state["research_files"]:
-        state["research_files"].append(args.file)
-    add_history(state, f"Research file added: {args.file}")
-    save_state(args.folder, state)
+    state, _ = record_event(args.folder, "add-research", args.expect_version, args.lock_timeout,
+                            args.registry, file=args.file)
     print(f"Research files: {state['research_files']}")
 
 
 def cmd_status(args):
-    state = load_state(args.folder)
+    with read_lock(args.folder, args.lock_timeout):
+        state, _ = load_state(args.folder)
     print(json.dumps(state, indent=2, default=str))
 
 
+def normalize_time_bound(value: Optional[str], end: bool = False) -> Optional[str]:
+    """Accept 'YYYY-MM-DD' or 'YYYY-MM-DD HH:MM[:SS]' and return an ISO prefix bound."""
+    if not value:
+        return None
+    value = value.replace(" ", "T")
+    for fmt in ("%Y-%m-%dT%H:%M:%S", "%Y-%m-%dT%H:%M", "%Y-%m-%d"):
+        try:
+            parsed = datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+        if end:
+            parsed += {"%Y-%m-%d": timedelta(days=1), "%Y-%m-%dT%H:%M": timedelta(minutes=1)}.get(
+                fmt, timedelta(seconds=1))
+        return parsed.isoformat()
+    print(f"Error: Invalid time '{value}', expected YYYY-MM-DD[ HH:MM[:SS]]", file=sys.stderr)
+    sys.exit(1)
+
+
+def query_history(folder: str, since: Optional[str], until: Optional[str], ops: set[str],
+                  iteration: Optional[int]):
+    """Yield matching history events from the archive blocks, then the journal."""
+    def matches(event: dict) -> bool:
+        return ((since is None or event["timestamp"] >= since)
+                and (until is None or event["timestamp"] < until)
+                and (not ops or event["op"] in ops)
+                and (iteration is None or event.get("iteration") == iteration))
+
+    index = load_history_index(folder)
+    if index["blocks"]:
+        with open(get_history_path(folder), "rb") as f:
+            for block in index["blocks"]:
+                if since and block["last"] < since or until and block["first"] >= until:
+                    continue
+                if ops and not ops.intersection(block["ops"]):
+                    continue
+                if iteration is not None and not block["iterations"][0] <= iteration <= block["iterations"][1]:
+                    continue
+                f.seek(block["offset"])
+                for line in f.read(block["length"]).splitlines():
+                    event = json.loads(line)
+                    if matches(event):
+                        yield event
+    archived = last_archived_seq(folder)
+    for event in read_journal(folder):
+        if event["seq"] > archived and matches(event):
+            yield event
+
+
+def cmd_history(args):
+    ops = set(t for value in args.event_type or [] for t in value.split(",") if t)
+    since, until = normalize_time_bound(args.since), normalize_time_bound(args.until, end=True)
+    with read_lock(args.folder, args.lock_timeout):
+        if not os.path.exists(get_journal_path(args.folder)):
+            load_state(args.folder)  # migrates a legacy folder or reports the missing state
+        for event in query_history(args.folder, since, until, ops, args.iteration):
+            print(json.dumps(event, default=str))
+
+
+def cmd_list(args):
+    path = get_registry_path(None, args.registry)
+    if args.reindex:
+        for name in sorted(os.listdir(args.reindex)):
+            folder = os.path.join(args.reindex, name)
+            if os.path.exists(get_state_path(folder)):
+                with open(get_state_path(folder), "r") as f:
+                    state = json.load(f)
+                updated = state["history"][-1]["timestamp"] if state.get("history") else state["started"]
+                register_state(folder, state, updated, path)
+    if not os.path.exists(path):
+        print(f"Error: Registry not found at {path}", file=sys.stderr)
+        sys.exit(1)
+
+    query = "SELECT folder, project, phase, iteration, verdict, version, started, updated FROM workflows"
+    clauses, params = [], []
+    if args.phase:
+        clauses.append("phase = ?")
+        params.append(args.phase)
+    if args.verdict:
+        clauses.append("verdict = ?")
+        params.append(args.verdict)
+    if args.project:
+        clauses.append("project = ?")
+        params.append(args.project)
+    if args.stale_hours is not None:
+        clauses.append("updated < ?")
+        params.append((datetime.now() - timedelta(hours=args.stale_hours)).isoformat())
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+    query += " ORDER BY updated DESC"
+    conn = open_registry(path)
+    columns = ["folder", "project", "phase", "iteration", "verdict", "version", "started", "updated"]
+    rows = [dict(zip(columns, row)) for row in conn.execute(query, params)]
+    conn.close()
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    print(f"{len(rows)} workflow(s) in {path}")
+    for row in rows:
+        print(f"  {row['updated'][:19]}  {row['phase']:<9} iter {row['iteration']}  "
+              f"{row['verdict'] or '-':<11} {row['project']}  {row['folder']}")
+
+
+def add_update_options(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--expect-version", type=int,
+                        help=f"Only apply if the state is at this version (exit {EXIT_CONFLICT} on conflict)")
+    parser.add_argument("--lock-timeout", type=float, default=LOCK_TIMEOUT,
+                        help=f"Seconds to wait for the state lock (default: {LOCK_TIMEOUT:g})")
+    add_registry_option(parser)
+
+
+def add_registry_option(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--registry", help=f"SQLite registry path (default: ${REGISTRY_ENV} or "
+                                           f"{REGISTRY_NAME} beside the folder)")
+
+
 def main():
     parser = argparse.ArgumentParser(description="Workflow state tracker")
     subparsers = parser.add_subparsers(dest="command", required=True)
@@ -124,36 +622,68 @@ def main():
     p_init = subparsers.add_parser("init", help="Initialize workflow state")
     p_init.add_argument("--folder", required=True, help="Path to generated_docs folder")
     p_init.add_argument("--project", help="Project name")
+    p_init.add_argument("--lock-timeout", type=float, default=LOCK_TIMEOUT,
+                        help=f"Seconds to wait for the state lock (default: {LOCK_TIMEOUT:g})")
+    add_registry_option(p_init)
     p_init.set_defaults(func=cmd_init)
 
     # set-phase
     p_phase = subparsers.add_parser("set-phase", help="Set current workflow phase")
     p_phase.add_argument("--folder", required=True, help="Path to generated_docs folder")
     p_phase.add_argument("--phase", required=True, help="Phase: research|design|review|delivery")
+    add_update_options(p_phase)
     p_phase.set_defaults(func=cmd_set_phase)
 
     # increment-iteration
     p_iter = subparsers.add_parser("increment-iteration", help="Increment iteration counter")
     p_iter.add_argument("--folder", required=True, help="Path to generated_docs folder")
+    add_update_options(p_iter)
     p_iter.set_defaults(func=cmd_increment_iteration)
 
     # set-verdict
     p_verdict = subparsers.add_parser("set-verdict", help="Set Critic verdict")
     p_verdict.add_argument("--folder", required=True, help="Path to generated_docs folder")
     p_verdict.add_argument("--verdict", required=True, help="Verdict: APPROVED|CONDITIONAL|REJECTED")
+    add_update_options(p_verdict)
     p_verdict.set_defaults(func=cmd_set_verdict)
 
     # add-research
     p_research = subparsers.add_parser("add-research", help="Register a research file")
     p_research.add_argument("--folder", required=True, help="Path to generated_docs folder")
     p_research.add_argument("--file", required=True, help="Research file path")
+    add_update_options(p_research)
     p_research.set_defaults(func=cmd_add_research)
 
     # status
     p_status = subparsers.add_parser("status", help="Show current workflow state")
     p_status.add_argument("--folder", required=True, help="Path to generated_docs folder")
+    p_status.add_argument("--lock-timeout", type=float, default=LOCK_TIMEOUT,
+                          help=f"Seconds to wait for the state lock (default: {LOCK_TIMEOUT:g})")
     p_status.set_defaults(func=cmd_status)
 
+    # history
+    p_history = subparsers.add_parser("history", help="Query history events as JSONL")
+    p_history.add_argument("--folder", required=True, help="Path to generated_docs folder")
+    p_history.add_argument("--since", help="Only events at or after YYYY-MM-DD[ HH:MM[:SS]]")
+    p_history.add_argument("--until", help="Only events up to YYYY-MM-DD[ HH:MM[:SS]] (inclusive)")
+    p_history.add_argument("--event-type", action="append",
+                           help="init,set-phase,increment-iteration,set-verdict,add-research,legacy")
+    p_history.add_argument("--iteration", type=int, help="Only events recorded during this iteration")
+    p_history.add_argument("--lock-timeout", type=float, default=LOCK_TIMEOUT,
+                           help=f"Seconds to wait for the state lock (default: {LOCK_TIMEOUT:g})")
+    p_history.set_defaults(func=cmd_history)
+
+    # list
+    p_list = subparsers.add_parser("list", help="Query the registry of workflows across folders")
+    add_registry_option(p_list)
+    p_list.add_argument("--phase", help="Only workflows in this phase")
+    p_list.add_argument("--verdict", help="Only workflows with this verdict")
+    p_list.add_argument("--project", help="Only workflows for this project")
+    p_list.add_argument("--stale-hours", type=float, help="Only workflows not updated for this many hours")
+    p_list.add_argument("--reindex", metavar="DIR", help="First register every folder under DIR with a workflow_state.json")
+    p_list.add_argument("--json", action="store_true", help="Output JSON")
+    p_list.set_defaults(func=cmd_list)
+
     args = parser.parse_args()
     args.func(args)
 
@@ -0,0 +1,86 @@
+"""Stress tests for concurrent state-tracker writers."""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+STATE_TRACKER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             "scripts", "state-tracker.py")
+WORKERS = 12
+EVENTS_PER_WORKER = 10  # 120 events plus init crosses the 100-event snapshot
+
+# Each worker process loads state-tracker once and records its events in a loop.
+WRITER = """
+import importlib.util, sys
+spec = importlib.util.spec_from_file_location("state_tracker", sys.argv[1])
+tracker = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(tracker)
+folder, registry, worker, count = sys.argv[2], sys.argv[3], sys.argv[4], int(sys.argv[5])
+for n in range(count):
+    tracker.record_event(folder, "add-research", registry=registry, file=f"w{worker}-{n}.md")
+"""
+
+
+class ConcurrentWritersTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.folder = os.path.join(self.tmp.name, "generated_docs")
+        self.registry = os.path.join(self.tmp.name, "registry.sqlite")
+        self.tracker("init", "--project", "stress")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def tracker(self, command, *args, check=True):
+        return subprocess.run([sys.executable, STATE_TRACKER, command, "--folder", self.folder, *args,
+                               *(["--registry", self.registry] if command not in ("status", "history") else [])],
+                              check=check, capture_output=True, text=True)
+
+    def status(self) -> dict:
+        return json.loads(self.tracker("status").stdout)
+
+    def folder_contents(self) -> dict:
+        contents = {}
+        for name in sorted(os.listdir(self.folder)):
+            with open(os.path.join(self.folder, name), "rb") as f:
+                contents[name] = f.read()
+        return contents
+
+    def test_parallel_add_research(self):
+        workers = [
+            subprocess.Popen([sys.executable, "-c", WRITER, STATE_TRACKER, self.folder, self.registry,
+                              str(w), str(EVENTS_PER_WORKER)],
+                             stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+            for w in range(WORKERS)
+        ]
+        for worker in workers:
+            _, stderr = worker.communicate(timeout=120)
+            self.assertEqual(worker.returncode, 0, stderr)
+
+        total = 1 + WORKERS * EVENTS_PER_WORKER
+        state = self.status()
+        self.assertEqual(state["version"], total)
+        expected_files = sorted(f"w{w}-{n}.md" for w in range(WORKERS) for n in range(EVENTS_PER_WORKER))
+        self.assertEqual(sorted(state["research_files"]), expected_files)
+
+        events = [json.loads(line) for line in self.tracker("history").stdout.splitlines()]
+        self.assertEqual([e["seq"] for e in events], list(range(1, total + 1)))
+        self.assertEqual(sorted(e["file"] for e in events if e["op"] == "add-research"), expected_files)
+
+    def test_expect_version_conflict_writes_nothing(self):
+        self.tracker("add-research", "--file", "first.md", "--expect-version", "1")
+        before = self.folder_contents()
+
+        result = self.tracker("add-research", "--file", "stale.md", "--expect-version", "1", check=False)
+
+        self.assertEqual(result.returncode, 3, result.stderr)
+        self.assertIn("Conflict", result.stderr)
+        self.assertEqual(self.folder_contents(), before)
+        self.assertEqual(self.status()["version"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()